@@ -0,0 +1,42 @@
+"""Проверки настроек, которые `manage.py check` не найдёт сам."""
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+from django.utils.module_loading import import_string
+
+PROFILED_CACHE = 'core.profiling.ProfiledCache'
+
+
+def cache_backend(alias):
+    """Класс настоящего бэкенда кэша alias, под обёрткой ProfiledCache."""
+    config = settings.CACHES[alias]
+    path = config['BACKEND']
+    if path == PROFILED_CACHE:
+        path = config.get('OPTIONS', {})['BACKEND']
+    return import_string(path)
+
+
+def shared_cache_aliases():
+    return sorted({'default', settings.SESSION_CACHE_ALIAS})
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Сессии, пользователь запроса, подписки, поколения лент и лимиты
+    инвалидируются записью в кэш. С кэшем в памяти процесса эту запись
+    видит только один воркер, остальные отдают устаревшие данные — в том
+    числе сессии после выхода и смены пароля.
+    """
+    if not settings.SHARED_CACHE_REQUIRED:
+        return []
+    return [
+        Error(
+            f'Кэш {alias!r} хранится в памяти процесса и не общий для '
+            'воркеров.',
+            hint='Укажите CACHE_BACKEND и CACHE_LOCATION общего кэша '
+                 '(memcached, redis).',
+            id='core.E001',
+        )
+        for alias in shared_cache_aliases()
+        if issubclass(cache_backend(alias), LocMemCache)
+    ]
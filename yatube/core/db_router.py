@@ -0,0 +1,132 @@
+"""Чтение с реплик, запись в основную базу.
+
+На реплики уходят только чтения представлений, помеченных
+`@read_from_replica`, в безопасных запросах (GET/HEAD). Всё остальное —
+запись, транзакции, фоновые задачи и команды — работает с `default`.
+
+Чтобы пользователь видел свои изменения, несмотря на отставание реплик,
+после любой записи в запросе чтения до конца запроса идут в основную
+базу, а ответ ставит cookie, которая ещё REPLICA_STICKY_SECONDS держит
+его чтения на основной базе. Если задан REPLICA_LAG_PROBE, реплики с
+отставанием больше REPLICA_MAX_LAG секунд временно не используются.
+"""
+from contextvars import ContextVar
+import random
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max
+from django.utils.module_loading import import_string
+
+STICKY_COOKIE = 'primary_until'
+LAG_CACHE_KEY = 'db:replica_lag:{}'
+
+_state = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    def __init__(self):
+        self.replicas_allowed = False
+        self.wrote = False
+
+
+def read_from_replica(view):
+    """Разрешает представлению читать с реплик."""
+    view.read_from_replica = True
+    return view
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах по REPLICA_LAG_PROBE, с кэшем."""
+    key = LAG_CACHE_KEY.format(alias)
+    lag = cache.get(key)
+    if lag is None:
+        probe = import_string(settings.REPLICA_LAG_PROBE)
+        lag = probe(alias)
+        cache.set(key, lag, settings.REPLICA_LAG_CHECK_INTERVAL)
+    return lag
+
+
+def post_updated_lag(alias):
+    """Проба отставания: насколько последнее изменение поста на реплике
+    старше, чем на основной базе. Подходит при постоянном потоке записей.
+    """
+    posts = apps.get_model('posts', 'Post').objects
+    primary = posts.using(DEFAULT_DB_ALIAS).aggregate(last=Max('updated'))
+    replica = posts.using(alias).aggregate(last=Max('updated'))
+    if primary['last'] is None:
+        return 0.0
+    if replica['last'] is None:
+        return float('inf')
+    return max((primary['last'] - replica['last']).total_seconds(), 0.0)
+
+
+def healthy_replicas():
+    replicas = list(settings.DATABASE_REPLICAS)
+    if replicas and settings.REPLICA_LAG_PROBE:
+        replicas = [
+            alias for alias in replicas
+            if replica_lag(alias) <= settings.REPLICA_MAX_LAG
+        ]
+    return replicas
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replicas_allowed or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы, объекты из них связываются свободно.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с репликацией.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = ReplicaState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            sticky = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + sticky), max_age=sticky,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None or request.method not in ('GET', 'HEAD'):
+            return
+        try:
+            pinned = float(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            pinned = 0
+        state.replicas_allowed = (
+            getattr(view_func, 'read_from_replica', False)
+            and pinned <= time.time()
+        )
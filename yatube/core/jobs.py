@@ -0,0 +1,200 @@
+"""Очередь фоновых задач на таблице Job.
+
+Задача ставится одним вызовом `enqueue(func, *args, **kwargs)`: функция
+запоминается по пути импорта, аргументы сериализуются в JSON. Запись идёт
+в текущей транзакции, поэтому задача появляется вместе с данными, ради
+которых поставлена, а при откате исчезает вместе с ними.
+
+Параметры постановки:
+- queue — именованная очередь, воркер может разбирать только часть;
+- priority — задачи с большим приоритетом берутся раньше;
+- delay / run_at — не запускать раньше срока;
+- dedup_key — пока задача с таким ключом ждёт, такие же не ставятся;
+  ключ освобождается, когда воркер берёт задачу;
+- max_attempts — после стольких падений задача остаётся с failed_at.
+
+Воркеры (`manage.py run_workers`) берут задачи в аренду на JOBS_LEASE
+секунд, так что задачи упавшего воркера потом достанутся другим. Упавшая
+задача переносится с экспоненциальной задержкой.
+
+С TASKS_ALWAYS_EAGER задачи очереди default без отсрочки выполняются
+сразу при постановке — так проще отлаживать и тестировать.
+"""
+from datetime import timedelta
+import json
+import logging
+import os
+import random
+import threading
+import traceback
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+
+
+def task_path(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def job(func, *args, queue=DEFAULT_QUEUE, priority=0, delay=None,
+        run_at=None, dedup_key=None, max_attempts=None, **kwargs):
+    """Несохранённая задача func(*args, **kwargs) для enqueue_many."""
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job(
+        queue=queue,
+        task=task_path(func),
+        arguments=json.dumps([args, kwargs]),
+        priority=priority,
+        run_at=run_at,
+        dedup_key=dedup_key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def _call(task):
+    args, kwargs = json.loads(task.arguments)
+    return import_string(task.task)(*args, **kwargs)
+
+
+def enqueue_many(jobs):
+    """Ставит пачку задач одним INSERT; ждущие дубли по dedup_key
+    пропускаются.
+    """
+    queued = []
+    for task in jobs:
+        eager = (
+            settings.TASKS_ALWAYS_EAGER
+            and task.queue == DEFAULT_QUEUE
+            and task.run_at <= timezone.now()
+        )
+        if eager:
+            _call(task)
+        else:
+            queued.append(task)
+    if queued:
+        Job.objects.bulk_create(queued, ignore_conflicts=True)
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит func(*args, **kwargs) в очередь; параметры — как у `job`."""
+    enqueue_many([job(func, *args, **kwargs)])
+
+
+def backoff(attempts):
+    """Задержка перед попыткой attempts + 1, с разбросом до 20%."""
+    delay = min(
+        settings.JOBS_RETRY_BASE * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX,
+    )
+    return delay * random.uniform(1, 1.2)
+
+
+class Worker:
+    def __init__(self, queues=(), batch_size=10, name=None,
+                 close_connections=False):
+        self.queues = tuple(queues)
+        self.batch_size = batch_size
+        self.name = name or f'{os.getpid()}-{threading.get_ident()}'
+        # Долгоживущему воркеру соединения нужно проверять между пачками,
+        # как Django делает между запросами.
+        self.close_connections = close_connections
+
+    def available(self, now):
+        jobs = Job.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+            failed_at__isnull=True,
+            run_at__lte=now,
+        )
+        if self.queues:
+            jobs = jobs.filter(queue__in=self.queues)
+        return jobs
+
+    def claim(self):
+        """Берёт в аренду следующую пачку задач."""
+        now = timezone.now()
+        available = self.available(now)
+        ids = list(
+            available.order_by('-priority', 'run_at', 'pk')
+            .values_list('pk', flat=True)[:self.batch_size]
+        )
+        if not ids:
+            return []
+        # Условия available повторяются в UPDATE: задачи, которые успел
+        # взять другой воркер, не перезапишутся.
+        token = f'{self.name}:{uuid.uuid4().hex[:12]}'
+        available.filter(pk__in=ids).update(
+            locked_by=token,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE),
+            dedup_key=None,
+        )
+        return list(
+            Job.objects.filter(locked_by=token)
+            .order_by('-priority', 'run_at', 'pk')
+        )
+
+    def run(self, task):
+        try:
+            _call(task)
+        except Exception:
+            self.fail(task, traceback.format_exc())
+            return False
+        Job.objects.filter(pk=task.pk).delete()
+        return True
+
+    def fail(self, task, error):
+        attempts = task.attempts + 1
+        changes = {
+            'attempts': attempts,
+            'last_error': error,
+            'locked_by': None,
+            'locked_until': None,
+        }
+        if attempts >= task.max_attempts:
+            changes['failed_at'] = timezone.now()
+            logger.error('Задача %s сдалась после %s попыток:\n%s',
+                         task, attempts, error)
+        else:
+            changes['run_at'] = timezone.now() + timedelta(
+                seconds=backoff(attempts)
+            )
+            logger.warning('Задача %s упала, попытка %s:\n%s',
+                           task, attempts, error)
+        Job.objects.filter(pk=task.pk).update(**changes)
+
+    def run_batch(self):
+        """Выполняет одну пачку, возвращает число взятых задач."""
+        tasks = self.claim()
+        for task in tasks:
+            self.run(task)
+        return len(tasks)
+
+    def work(self, burst=False, interval=1.0, stop=None):
+        """Разбирает очередь; с burst — пока в ней есть готовые задачи.
+
+        Возвращает число выполненных (в том числе упавших) задач.
+        """
+        stop = stop or threading.Event()
+        done = 0
+        while not stop.is_set():
+            try:
+                taken = self.run_batch()
+            finally:
+                if self.close_connections:
+                    close_old_connections()
+            done += taken
+            if not taken:
+                if burst:
+                    break
+                stop.wait(interval)
+        return done
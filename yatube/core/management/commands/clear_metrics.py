@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import metrics
+
+
+class Command(BaseCommand):
+    help = 'Очищает METRICS_DIR перед запуском воркеров.'
+
+    def handle(self, *args, **options):
+        if not settings.METRICS_DIR:
+            raise CommandError('METRICS_DIR не задан, метрики выключены')
+        metrics.clear()
+        self.stdout.write(f'Каталог метрик {metrics.metrics_dir()} очищен')
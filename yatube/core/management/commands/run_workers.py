@@ -0,0 +1,79 @@
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, as_completed,
+)
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs import Worker
+
+_stop = threading.Event()
+
+
+def work(queues, batch_size, burst, interval):
+    worker = Worker(queues, batch_size, close_connections=True)
+    try:
+        return worker.work(burst=burst, interval=interval, stop=_stop)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Разбирает очередь фоновых задач пулом потоков или процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Размер пула; 0 — работать в текущем потоке',
+        )
+        parser.add_argument(
+            '--mode', choices=('thread', 'process'), default='thread',
+        )
+        parser.add_argument(
+            '--queue', dest='queues', action='append', default=[],
+            help='Разбирать только эту очередь (можно несколько раз)',
+        )
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда готовых задач не останется',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза опроса пустой очереди, секунды',
+        )
+
+    def handle(self, *args, workers, mode, queues, batch_size, burst,
+               interval, **options):
+        _stop.clear()
+        if not workers:
+            done = Worker(queues, batch_size).work(
+                burst=burst, interval=interval
+            )
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        if mode == 'process':
+            # Дочерние процессы не должны наследовать открытые соединения.
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=connections.close_all
+            )
+        else:
+            pool = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix='yatube-worker'
+            )
+        futures = [
+            pool.submit(work, queues, batch_size, burst, interval)
+            for _ in range(workers)
+        ]
+        done = 0
+        try:
+            for future in as_completed(futures):
+                done += future.result()
+        except KeyboardInterrupt:
+            # Потоки доделают текущую пачку; процессы получили SIGINT сами.
+            _stop.set()
+        finally:
+            pool.shutdown()
+        self.stdout.write(f'Выполнено задач: {done}')
@@ -0,0 +1,305 @@
+"""Метрики запросов в текстовом формате Prometheus.
+
+Каждый процесс пишет счётчики в собственный файл METRICS_DIR/<pid>.db,
+отображённый в память (mmap): инкремент — это запись восьми байт без
+системных вызовов. Эндпоинт /metrics/ читает файлы всех процессов и
+суммирует значения, поэтому метрики агрегируются по всем воркерам. Все
+метрики — счётчики (гистограмма — набор счётчиков корзин); файлы
+завершившихся процессов при чтении переносятся в archive.db и удаляются,
+так что сумма не убывает, а число файлов не растёт. Каталог свой у каждой
+выкладки, перед запуском воркеров его очищает `manage.py clear_metrics`.
+
+Число SQL-запросов и обращений к кэшу берётся из профиля запроса, который
+заводится только для доли METRICS_PROFILE_SAMPLE_RATE запросов; счётчики
+домножаются на обратную долю и потому оценочные.
+
+Формат файла: 8 байт заголовка (занятый объём), затем записи
+«длина ключа (4 байта), ключ в UTF-8 с выравниванием до 8 байт,
+значение double».
+"""
+from collections import defaultdict
+import fcntl
+import glob
+import json
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import profiling
+
+ARCHIVE = 'archive.db'
+COMPACT_LOCK = 'compact.lock'
+INITIAL_SIZE = 1 << 16
+HEADER = struct.Struct('q')
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'),
+)
+METRICS = {
+    'yatube_requests_total': (
+        'counter', 'Запросы по имени URL, методу и статусу'
+    ),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа по имени URL'
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'SQL-запросы по имени URL'
+    ),
+    'yatube_cache_lookups_total': (
+        'counter', 'Обращения к кэшу по имени URL и результату'
+    ),
+}
+
+
+class MmapedDict:
+    """Словарь ключ → float в файле, отображённом в память."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(INITIAL_SIZE)
+        self._capacity = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._positions = {}
+        self._used = HEADER.unpack_from(self._map, 0)[0]
+        if self._used == 0:
+            self._used = HEADER.size
+            HEADER.pack_into(self._map, 0, self._used)
+        for key, _, position in _entries(self._map, self._used):
+            self._positions[key] = position
+
+    def inc(self, key, amount=1.0):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._append(key)
+            value = VALUE.unpack_from(self._map, position)[0]
+            VALUE.pack_into(self._map, position, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padded = len(encoded) + (-(KEY_LENGTH.size + len(encoded)) % 8)
+        size = KEY_LENGTH.size + padded + VALUE.size
+        while self._used + size > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        start = self._used + KEY_LENGTH.size
+        self._map[start:start + len(encoded)] = encoded
+        position = start + padded
+        VALUE.pack_into(self._map, position, 0.0)
+        self._used += size
+        HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _entries(buffer, used):
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(buffer, position)[0]
+        start = position + KEY_LENGTH.size
+        key = bytes(buffer[start:start + length]).decode()
+        slot = start + length + (-(KEY_LENGTH.size + length) % 8)
+        yield key, VALUE.unpack_from(buffer, slot)[0], slot
+        position = slot + VALUE.size
+
+
+def read_file(path):
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    if len(data) < HEADER.size:
+        return
+    used = HEADER.unpack_from(data, 0)[0]
+    for key, value, _ in _entries(data, used):
+        yield key, value
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def metrics_dir():
+    return settings.METRICS_DIR
+
+
+def store():
+    """Файл текущего процесса; после fork у потомка будет свой."""
+    directory, pid = key = (metrics_dir(), os.getpid())
+    with _stores_lock:
+        if key not in _stores:
+            os.makedirs(directory, exist_ok=True)
+            _stores[key] = MmapedDict(os.path.join(directory, f'{pid}.db'))
+        return _stores[key]
+
+
+def metric_key(name, **labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+def inc(name, amount=1.0, **labels):
+    store().inc(metric_key(name, **labels), amount)
+
+
+def observe_request(view, method, status, seconds, queries, hits, misses):
+    inc('yatube_requests_total', view=view, method=method, status=status)
+    histogram = 'yatube_request_duration_seconds'
+    for bucket in LATENCY_BUCKETS:
+        if seconds <= bucket:
+            inc(
+                f'{histogram}_bucket',
+                view=view, status=status, le=_format(bucket),
+            )
+    inc(f'{histogram}_sum', seconds, view=view, status=status)
+    inc(f'{histogram}_count', view=view, status=status)
+    if queries:
+        inc('yatube_db_queries_total', queries, view=view)
+    if hits:
+        inc('yatube_cache_lookups_total', hits, view=view, result='hit')
+    if misses:
+        inc('yatube_cache_lookups_total', misses, view=view, result='miss')
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _process_files(directory):
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        pid = os.path.basename(path)[:-len('.db')]
+        if pid.isdigit():
+            yield int(pid), path
+
+
+def compact():
+    """Переносит счётчики завершившихся процессов в archive.db."""
+    directory = metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, COMPACT_LOCK), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = None
+        try:
+            for pid, path in _process_files(directory):
+                if _alive(pid):
+                    continue
+                if archive is None:
+                    archive = MmapedDict(os.path.join(directory, ARCHIVE))
+                for key, value in read_file(path):
+                    archive.inc(key, value)
+                os.remove(path)
+        finally:
+            if archive is not None:
+                archive.close()
+
+
+def clear():
+    """Удаляет все файлы метрик; запускается до старта воркеров."""
+    directory = metrics_dir()
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        os.remove(path)
+    with _stores_lock:
+        for key in [key for key in _stores if key[0] == directory]:
+            _stores.pop(key).close()
+
+
+def collect():
+    """Сумма значений по файлам всех процессов."""
+    compact()
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(metrics_dir(), '*.db')):
+        for key, value in read_file(path):
+            totals[key] += value
+    return totals
+
+
+def _format(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def exposition():
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    samples = defaultdict(list)
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        family = name
+        for suffix in ('_bucket', '_sum', '_count'):
+            if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                family = name[:-len(suffix)]
+        samples[family].append((name, labels, value))
+    lines = []
+    for family, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        for name, labels, value in sorted(samples[family]):
+            rendered = ','.join(
+                f'{label}="{_escape(text)}"' for label, text in labels
+            )
+            lines.append(f'{name}{{{rendered}}} {_format(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.METRICS_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_PROFILE_SAMPLE_RATE
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        sampled = (
+            self.sample_rate > 0 and random.random() < self.sample_rate
+        )
+        counts = {}
+        if sampled:
+            with profiling.profiled() as profile:
+                response = self.get_response(request)
+            counts = {
+                name: value / self.sample_rate
+                for name, value in profile.counts.items()
+            }
+        else:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        observe_request(
+            view=match.view_name if match else '<unresolved>',
+            method=request.method,
+            status=response.status_code,
+            seconds=time.perf_counter() - started,
+            queries=counts.get('db', 0),
+            hits=counts.get('cache_hit', 0),
+            misses=counts.get('cache_miss', 0),
+        )
+        return response
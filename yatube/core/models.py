@@ -0,0 +1,43 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """Фоновая задача очереди `core.jobs`.
+
+    Выполненные задачи удаляются; упавшие MAX_ATTEMPTS раз остаются с
+    failed_at и текстом последней ошибки.
+    """
+    queue = models.CharField('Очередь', max_length=32, default='default')
+    task = models.CharField('Функция', max_length=255)
+    arguments = models.TextField('Аргументы в JSON', default='[[], {}]')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    run_at = models.DateTimeField('Запустить не раньше')
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=255, null=True, blank=True,
+        unique=True,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Предел попыток')
+    locked_by = models.CharField(
+        'Воркер', max_length=64, null=True, blank=True
+    )
+    locked_until = models.DateTimeField(
+        'Аренда до', null=True, blank=True
+    )
+    failed_at = models.DateTimeField('Сдалась', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Поставлена', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            # Выбор следующих задач: очередь, затем приоритет и срок.
+            models.Index(
+                fields=('queue', '-priority', 'run_at'),
+                name='job_next',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
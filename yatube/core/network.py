@@ -0,0 +1,18 @@
+from django.conf import settings
+
+
+def client_ip(request):
+    """Адрес клиента.
+
+    За обратным прокси REMOTE_ADDR — адрес самого прокси, поэтому адрес
+    берётся из заголовка CLIENT_IP_HEADER (например,
+    HTTP_X_FORWARDED_FOR). В X-Forwarded-For доверять можно только
+    последнему адресу — его дописал наш прокси, остальные прислал клиент.
+    Заголовок включают, только если все запросы идут через прокси.
+    """
+    header = settings.CLIENT_IP_HEADER
+    if header:
+        forwarded = request.META.get(header, '').split(',')[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.META.get('REMOTE_ADDR', '')
@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+# Глубже этой страницы ?page=N не обслуживается через OFFSET,
+# дальше листаем только курсорами.
+MAX_OFFSET_PAGE = 5
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(moment, pk):
+    """Курсор вида `<микросекунды от эпохи>_<pk>`."""
+    delta = moment - EPOCH
+    microseconds = (
+        (delta.days * 86400 + delta.seconds) * 10 ** 6 + delta.microseconds
+    )
+    return f'{microseconds}_{pk}'
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор, для мусора возвращает None."""
+    try:
+        microseconds, pk = cursor.split('_')
+        return EPOCH + timedelta(microseconds=int(microseconds)), int(pk)
+    except (AttributeError, TypeError, ValueError, OverflowError):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по паре (ключ, id), по умолчанию ключ — дата.
+
+    Страница выбирается курсорами `?after=` (следующие записи, по
+    умолчанию более старые) и `?before=` (предыдущие), а первые
+    MAX_OFFSET_PAGE страниц доступны и по старым ссылкам `?page=N`.
+    COUNT(*) не выполняется: чтобы узнать, есть ли следующая страница,
+    выбирается на одну запись больше.
+    """
+
+    def __init__(self, object_list, per_page, key_field='pub_date',
+                 descending=True):
+        self.key_field = key_field
+        self.descending = descending
+        super().__init__(
+            object_list.order_by(*self._ordering(descending)), per_page
+        )
+        self.number = 1
+        self.has_next_page = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @property
+    def num_pages(self):
+        return self.number + 1 if self.has_next_page else self.number
+
+    def encode_cursor(self, obj):
+        return encode_cursor(getattr(obj, self.key_field), obj.pk)
+
+    def decode_cursor(self, cursor):
+        return decode_cursor(cursor)
+
+    def page_for_request(self, request):
+        params = request.GET
+        number = self._parse_number(params.get('page'))
+        after = self.decode_cursor(params.get('after'))
+        before = self.decode_cursor(params.get('before'))
+        if after:
+            rows = self._fetch_after(*after)
+            self.has_next_page = len(rows) > self.per_page
+            self.number = max(number, 2)
+        elif before:
+            rows = self._fetch_before(*before)
+            # Курсор before берётся с первой записи следующей страницы,
+            # значит, она точно существует.
+            self.has_next_page = True
+            self.number = max(number, 2) if len(rows) > self.per_page else 1
+            rows = rows[:self.per_page][::-1]
+        else:
+            self.number = min(number, MAX_OFFSET_PAGE)
+            offset = (self.number - 1) * self.per_page
+            rows = list(self.object_list[offset:offset + self.per_page + 1])
+            self.has_next_page = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if rows:
+            self.previous_cursor = self.encode_cursor(rows[0])
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return Page(rows, self.number, self)
+
+    def _parse_number(self, number):
+        try:
+            return max(int(number), 1)
+        except (TypeError, ValueError):
+            return 1
+
+    def _ordering(self, descending):
+        if descending:
+            return f'-{self.key_field}', '-pk'
+        return self.key_field, 'pk'
+
+    def _beyond(self, key, pk, lookup):
+        return (
+            Q(**{f'{self.key_field}__{lookup}': key})
+            | Q(**{self.key_field: key, f'pk__{lookup}': pk})
+        )
+
+    def _fetch_after(self, key, pk):
+        lookup = 'lt' if self.descending else 'gt'
+        return list(
+            self.object_list.filter(self._beyond(key, pk, lookup))
+            [:self.per_page + 1]
+        )
+
+    def _fetch_before(self, key, pk):
+        lookup = 'gt' if self.descending else 'lt'
+        return list(
+            self.object_list.filter(self._beyond(key, pk, lookup))
+            .order_by(*self._ordering(not self.descending))
+            [:self.per_page + 1]
+        )
+
+
+class ScoreCursorPaginator(CursorPaginator):
+    """Та же keyset-пагинация, но по целочисленному рейтингу."""
+
+    def encode_cursor(self, obj):
+        return f'{getattr(obj, self.key_field)}_{obj.pk}'
+
+    def decode_cursor(self, cursor):
+        try:
+            score, pk = cursor.split('_')
+            return int(score), int(pk)
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+
+def paginate(request, queryset, per_page, key_field='pub_date',
+             descending=True):
+    return CursorPaginator(
+        queryset, per_page, key_field, descending
+    ).page_for_request(request)
@@ -0,0 +1,246 @@
+"""Профиль запроса: SQL, шаблоны, кэш и миниатюры.
+
+ProfilingMiddleware заводит профиль на время запроса и отдаёт его в
+заголовке Server-Timing и, для доли запросов PROFILING_LOG_SAMPLE_RATE,
+одной JSON-строкой в лог `core.profiling`. Шаблоны и кэш подключаются
+через свои обёртки (ProfiledDjangoTemplates, ProfiledCache), прочий
+код оборачивает дорогие участки в `timer(name)`. Если профиль запросу не
+нужен, он не заводится, и каждая точка замера стоит одного чтения
+ContextVar.
+"""
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+_MISSING = object()
+
+# Метрики заголовка: имя в профиле → (имя в Server-Timing, что считаем).
+# Заголовки HTTP — latin-1, поэтому описания латиницей.
+SERVER_TIMING = (
+    ('db', 'db', 'queries'),
+    ('template', 'tpl', 'templates'),
+    ('cache', 'cache', 'lookups'),
+    ('thumbnail', 'thumb', 'thumbnails'),
+)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, name, seconds=0.0, count=1):
+        self.durations[name] += seconds
+        self.counts[name] += count
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total() * 1000, 3),
+            **{
+                f'{name}_ms': round(seconds * 1000, 3)
+                for name, seconds in self.durations.items()
+            },
+            **{f'{name}_count': count for name, count in self.counts.items()},
+        }
+
+    def server_timing(self):
+        metrics = []
+        for name, metric, description in SERVER_TIMING:
+            if name in self.counts:
+                metrics.append(
+                    f'{metric};dur={self.durations[name] * 1000:.1f};'
+                    f'desc="{self.counts[name]} {description}"'
+                )
+        if 'cache_hit' in self.counts or 'cache_miss' in self.counts:
+            metrics.append(
+                f'cache-hit;desc="{self.counts["cache_hit"]}", '
+                f'cache-miss;desc="{self.counts["cache_miss"]}"'
+            )
+        metrics.append(f'total;dur={self.total() * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def count(name, value=1):
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, count=value)
+
+
+@contextmanager
+def timer(name):
+    """Добавляет время блока к метрике name текущего профиля."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - started)
+
+
+class _QueryTimer:
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.add('db', time.perf_counter() - started)
+
+
+@contextmanager
+def profiled():
+    """Профиль на время блока; если он уже заведён выше, переиспользуется.
+    """
+    profile = _current.get()
+    if profile is not None:
+        yield profile
+        return
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(_QueryTimer(profile))
+                )
+            yield profile
+    finally:
+        _current.reset(token)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = getattr(settings, 'PROFILING_SERVER_TIMING', False)
+        self.sample_rate = getattr(
+            settings, 'PROFILING_LOG_SAMPLE_RATE', 0.0
+        )
+
+    def __call__(self, request):
+        sampled = (
+            self.sample_rate > 0 and random.random() < self.sample_rate
+        )
+        if not (self.header or sampled):
+            return self.get_response(request)
+        with profiled() as profile:
+            response = self.get_response(request)
+        if self.header:
+            response['Server-Timing'] = profile.server_timing()
+        if sampled:
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **profile.as_dict(),
+            }))
+        return response
+
+
+class ProfiledTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return super().render(context, request)
+
+
+class ProfiledDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, замеряющий рендер шаблонов верхнего уровня.
+
+    Вложенные {% include %} рендерятся движком напрямую и входят во время
+    родительского шаблона, как и SQL ленивых queryset из шаблона.
+    """
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return ProfiledTemplate(template.template, self)
+
+
+def _timed_method(name):
+    def method(self, *args, **kwargs):
+        with timer('cache'):
+            return getattr(self.backend, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+class ProfiledCache:
+    """Обёртка над любым бэкендом кэша: время обращений, попадания и промахи.
+
+    Настоящий бэкенд указывается в OPTIONS['BACKEND'], остальные параметры
+    (LOCATION, TIMEOUT, прочие OPTIONS) передаются ему как есть:
+
+        'BACKEND': 'core.profiling.ProfiledCache',
+        'LOCATION': '127.0.0.1:11211',
+        'OPTIONS': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        },
+
+    Методы, которых здесь нет, отдаются бэкенду без замеров.
+    """
+
+    def __init__(self, location, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS') or {})
+        backend = import_string(options.pop('BACKEND'))
+        params['OPTIONS'] = options
+        self.backend = backend(location, params)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def __contains__(self, key):
+        return self.has_key(key)
+
+    def get(self, key, default=None, version=None):
+        with timer('cache'):
+            value = self.backend.get(key, _MISSING, version)
+        if value is _MISSING:
+            count('cache_miss')
+            return default
+        count('cache_hit')
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with timer('cache'):
+            values = self.backend.get_many(keys, version)
+        count('cache_hit', len(values))
+        count('cache_miss', len(keys) - len(values))
+        return values
+
+    set = _timed_method('set')
+    add = _timed_method('add')
+    get_or_set = _timed_method('get_or_set')
+    set_many = _timed_method('set_many')
+    delete = _timed_method('delete')
+    delete_many = _timed_method('delete_many')
+    has_key = _timed_method('has_key')
+    incr = _timed_method('incr')
+    decr = _timed_method('decr')
+    touch = _timed_method('touch')
+    clear = _timed_method('clear')
@@ -0,0 +1,99 @@
+"""Бюджет SQL-запросов на представление.
+
+Представление объявляет бюджет декоратором `@query_budget(n)`. Middleware
+считает запросы каждого запроса и при превышении пишет предупреждение в лог,
+а с `QUERY_BUDGET_RAISE = True` — бросает QueryBudgetExceeded. В тестах
+тот же бюджет проверяет `QueryBudgetTestMixin`.
+"""
+from contextlib import ExitStack, contextmanager
+import logging
+
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(budget):
+    """Объявляет, сколько SQL-запросов может выполнить представление."""
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def budget_of(view):
+    # Декораторы Django копируют атрибуты через functools.wraps,
+    # поэтому бюджет виден и на обёрнутом представлении.
+    return getattr(view, 'query_budget', None)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы ко всем базам без включения debug-курсора."""
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as counter:
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f'{request.path}: {counter.count} SQL-запросов '
+                f'при бюджете {budget}'
+            )
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = budget_of(view_func)
+
+
+class QueryBudgetTestMixin:
+    """Проверки бюджета для TestCase."""
+
+    def assertWithinBudget(self, client, url, data=None):
+        """Запрашивает URL (POST, если передан data) и сверяет число
+        запросов с бюджетом view.
+
+        Возвращает число запросов, чтобы тест мог сравнить его на разных
+        объёмах данных.
+        """
+        budget = budget_of(resolve(url).func)
+        self.assertIsNotNone(budget, f'{url}: бюджет не объявлен')
+        with count_queries() as counter:
+            if data is None:
+                response = client.get(url)
+            else:
+                response = client.post(url, data)
+        self.assertLess(response.status_code, 400, url)
+        self.assertLessEqual(
+            counter.count, budget,
+            f'{url}: {counter.count} SQL-запросов при бюджете {budget}',
+        )
+        return counter.count
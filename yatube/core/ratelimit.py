@@ -0,0 +1,80 @@
+"""Ограничение частоты запросов: счётчик фиксированного окна в кэше.
+
+RATE_LIMITS задаёт для имени URL ограничиваемые методы и лимиты «на
+пользователя» и «на IP»: (запросов, окно в секундах). Запрос
+вошедшего пользователя считается в его счётчике, анонимный — в счётчике
+адреса. Счётчик текущего окна — один ключ в общем кэше, запрос
+увеличивает его одним атомарным `incr`, так что лимит действует на все
+воркеры вместе и стоит одно обращение к кэшу. Только первый запрос окна
+создаёт ключ через `add`. Сверх лимита возвращается 429 с Retry-After
+до конца окна.
+"""
+from http import HTTPStatus
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from .network import client_ip
+
+COUNTER_KEY = 'ratelimit:{}:{}:{}:{}'
+
+
+def hit(key, period):
+    """Увеличивает счётчик окна и возвращает новое значение."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключа ещё нет или он истёк; add атомарен, проигравший гонку
+        # увеличивает ключ победителя.
+        if cache.add(key, 1, math.ceil(period) + 1):
+            return 1
+        return cache.incr(key)
+
+
+def counter_for(request, view_name, limits):
+    """(ключ без окна, лимит, окно) для запроса или None."""
+    if request.user.is_authenticated and 'user' in limits:
+        kind, identity = 'user', request.user.pk
+    elif 'ip' in limits:
+        kind, identity = 'ip', client_ip(request)
+    else:
+        return None
+    capacity, period = limits[kind]
+    return (view_name, kind, identity), capacity, period
+
+
+def take(counter, now=None):
+    """Считает запрос, возвращает 0 или через сколько секунд повторить."""
+    (view_name, kind, identity), capacity, period = counter
+    now = time.time() if now is None else now
+    window = int(now // period)
+    key = COUNTER_KEY.format(view_name, kind, identity, window)
+    if hit(key, period) <= capacity:
+        return 0
+    return (window + 1) * period - now
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        limits = settings.RATE_LIMITS.get(view_name)
+        if limits is None or request.method not in limits['methods']:
+            return None
+        counter = counter_for(request, view_name, limits)
+        retry_after = take(counter) if counter else 0
+        if not retry_after:
+            return None
+        response = render(
+            request, 'core/429.html', status=HTTPStatus.TOO_MANY_REQUESTS
+        )
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
@@ -0,0 +1,192 @@
+"""Статика с хэшем в имени, заранее сжатая, с вечным кэшированием.
+
+`collectstatic` через CompressedManifestStaticFilesStorage пишет копии
+файлов с хэшем содержимого в имени и манифест staticfiles.json, по
+которому `{% static %}` подставляет хэшированные имена. Рядом с каждым
+сжимаемым файлом кладутся .gz и, если установлен пакет brotli, .br —
+сжатие делается один раз при выкладке, а не в каждом запросе.
+
+Без DEBUG статику отдаёт StaticFilesMiddleware: при старте она один раз
+обходит STATIC_ROOT, а в запросе выбирает по Accept-Encoding готовый
+вариант файла. Хэшированные имена отдаются с Cache-Control immutable на
+год — при изменении файла меняется и имя, так что браузер больше не
+перепроверяет CSS и JS на каждой странице.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Уже сжатые форматы: повторное сжатие ничего не даст.
+SKIP_EXTENSIONS = {
+    '.br', '.gz', '.zip', '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.avif', '.woff', '.woff2', '.mp4', '.webm',
+}
+# Сжатая копия хранится, только если заметно меньше оригинала.
+MIN_RATIO = 0.95
+
+
+def gzip_compress(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+def compressors():
+    """(суффикс, Content-Encoding, функция) в порядке предпочтения."""
+    available = [('.gz', 'gzip', gzip_compress)]
+    if brotli is not None:
+        available.insert(0, ('.br', 'br', brotli_compress))
+    return available
+
+
+def compressible(name):
+    return os.path.splitext(name)[1].lower() not in SKIP_EXTENSIONS
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def stored_name(self, name):
+        # До первого collectstatic (разработка, тесты) манифеста нет —
+        # ссылки ведут на исходные имена. С манифестом работает строгая
+        # проверка: файл, которого в нём нет, — ошибка выкладки.
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if not isinstance(processed, Exception):
+                names.add(name)
+                if hashed_name:
+                    names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(names):
+            if compressible(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as original:
+            data = original.read()
+        for suffix, _, function in compressors():
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            compressed = function(data)
+            if len(compressed) < len(data) * MIN_RATIO:
+                self._save(compressed_name, ContentFile(compressed))
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме отвергнутых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+class StaticFile:
+    def __init__(self, path, variants, cache_control):
+        self.path = path
+        # [(Content-Encoding, путь)] в порядке предпочтения.
+        self.variants = variants
+        self.cache_control = cache_control
+        self.content_type = (
+            mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+
+    def response(self, request):
+        path, encoding = self.path, None
+        if self.variants:
+            accepted = accepted_encodings(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')
+            )
+            for coding, variant in self.variants:
+                if coding in accepted:
+                    path, encoding = variant, coding
+                    break
+        response = FileResponse(
+            open(path, 'rb'), content_type=self.content_type
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if self.variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = self.cache_control
+        return response
+
+
+def scan(root, url, immutable_names):
+    """Словарь URL → StaticFile для всех файлов в root."""
+    found = {}
+    for directory, _, filenames in os.walk(root):
+        existing = set(filenames)
+        for filename in filenames:
+            if filename.endswith(('.gz', '.br')) and (
+                os.path.splitext(filename)[0] in existing
+            ):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            variants = [
+                (coding, path + suffix)
+                for suffix, coding in (('.br', 'br'), ('.gz', 'gzip'))
+                if filename + suffix in existing
+            ]
+            cache_control = (
+                IMMUTABLE if name in immutable_names
+                else f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+            found[url + name] = StaticFile(path, variants, cache_control)
+    return found
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику без DEBUG; с DEBUG её отдаёт runserver."""
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+        self.files = scan(
+            settings.STATIC_ROOT,
+            settings.STATIC_URL,
+            set(hashed_files.values()),
+        )
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            static_file = self.files.get(request.path_info)
+            if static_file is not None:
+                return static_file.response(request)
+        return self.get_response(request)
@@ -1,7 +1,12 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from .metrics import exposition
+from .network import client_ip
+
 
 def page_not_found(request, exception):
     return render(
@@ -20,3 +25,14 @@ def server_error(request):
     return render(
         request, 'core/500.html', status=HTTPStatus.INTERNAL_SERVER_ERROR
     )
+
+
+def metrics(request):
+    """Метрики для Prometheus, только с внутренних адресов."""
+    if not settings.METRICS_DIR:
+        raise Http404
+    if client_ip(request) not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(
+        exposition(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,206 @@
+"""Замер задержек страниц posts тестовым клиентом Django.
+
+Каждый URL из posts/urls.py запрашивается несколько раз в процессе, для
+него собираются перцентили времени ответа, число и время SQL-запросов и
+размер ответа. Параметры URL берутся из данных: самый популярный автор,
+самая большая группа, самый обсуждаемый пост, самый подписанный читатель.
+
+Каждый ответ сверяется с ожидаемым статусом: замер ошибки или редиректа
+на логин выдавал бы чужие цифры за цифры страницы. Выгрузка доступна
+только автору и запрашивается от его имени. Лимиты частоты на время
+замера выключены — подписка и отписка повторяются десятки раз в минуту.
+"""
+from contextlib import contextmanager
+from http import HTTPStatus
+import shutil
+import tempfile
+import time
+
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_databases,
+    setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+import numpy as np
+
+from .models import Group, Post, User
+from .seeding import Seeder
+from .urls import app_name, urlpatterns
+
+PERCENTILES = (50, 95, 99)
+# Статус ответа маршрутов, которые не отвечают 200.
+EXPECTED_STATUS = {
+    'add_comment': HTTPStatus.FOUND,
+    'profile_follow': HTTPStatus.FOUND,
+    'profile_unfollow': HTTPStatus.FOUND,
+}
+# Маршруты, которые открываются только автору.
+AS_AUTHOR = frozenset({'profile_export'})
+
+
+class UnexpectedStatus(Exception):
+    pass
+
+
+@contextmanager
+def scratch_database():
+    """Отдельная тестовая база и MEDIA_ROOT: рабочие данные не трогаются."""
+    media_root = tempfile.mkdtemp()
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        with override_settings(MEDIA_ROOT=media_root):
+            yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+def seed_size(users, seed):
+    """Засевает базу; объём данных растёт вместе с числом пользователей."""
+    Seeder(seed).run(
+        users=users,
+        groups=max(users // 50, 1),
+        posts=users * 20,
+        comments=users * 50,
+        follows=users * 30,
+        images=5,
+    )
+
+
+def sample_kwargs():
+    """Параметры URL и пользователь, от имени которого идут запросы."""
+    reader = User.objects.annotate(
+        follows=Count('follower')
+    ).order_by('-follows', 'pk').first()
+    author = User.objects.annotate(
+        followers=Count('following')
+    ).order_by('-followers', 'pk').first()
+    group = Group.objects.annotate(
+        posts_total=Count('posts')
+    ).order_by('-posts_total', 'pk').first()
+    posts = Post.objects.order_by('-comments_count', '-pk')
+    # Свой пост читателя позволяет замерить и форму редактирования.
+    post = posts.filter(author=reader).first() or posts.first()
+    kwargs = {
+        'username': author and author.username,
+        'slug': group and group.slug,
+        'post_id': post and post.pk,
+    }
+    return reader, kwargs
+
+
+def view_urls(kwargs):
+    """Пары (имя, URL) для всех маршрутов posts, которые можно построить."""
+    urls = []
+    for pattern in urlpatterns:
+        params = list(pattern.pattern.converters)
+        if any(kwargs.get(param) is None for param in params):
+            continue
+        name = f'{app_name}:{pattern.name}'
+        urls.append((pattern.name, reverse(name, kwargs={
+            param: kwargs[param] for param in params
+        })))
+    return urls
+
+
+def _response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def _get(client, url, expected):
+    response = client.get(url)
+    if response.status_code != expected:
+        raise UnexpectedStatus(
+            f'{url}: ответ {response.status_code}, ожидался {expected}'
+        )
+    return response
+
+
+def measure(client, url, repeat, warmup=1, before_request=None,
+            expected=HTTPStatus.OK):
+    for _ in range(warmup):
+        _get(client, url, expected)
+    latencies, query_counts, query_times = [], [], []
+    for _ in range(repeat):
+        if before_request is not None:
+            before_request()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = _get(client, url, expected)
+            size = _response_size(response)
+            latencies.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+        query_times.append(
+            sum(float(query['time']) for query in queries) * 1000
+        )
+    result = {
+        'url': url,
+        'status': response.status_code,
+        'bytes': size,
+        'queries': max(query_counts),
+        'query_ms': round(float(np.mean(query_times)), 3),
+        'mean_ms': round(float(np.mean(latencies)), 3),
+    }
+    for percentile, value in zip(
+        PERCENTILES, np.percentile(latencies, PERCENTILES)
+    ):
+        result[f'p{percentile}_ms'] = round(float(value), 3)
+    return result
+
+
+def _client(user):
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    return client
+
+
+def measure_views(repeat, warmup=1, before_request=None):
+    reader, kwargs = sample_kwargs()
+    reader_client = _client(reader)
+    author_client = _client(
+        User.objects.filter(username=kwargs['username']).first()
+    )
+    results = {}
+    with override_settings(RATE_LIMITS={}):
+        for name, url in view_urls(kwargs):
+            client = author_client if name in AS_AUTHOR else reader_client
+            results[name] = measure(
+                client, url, repeat, warmup, before_request,
+                EXPECTED_STATUS.get(name, HTTPStatus.OK),
+            )
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms=2.0):
+    """Регрессии относительно базовых замеров одного и того же формата.
+
+    Медленнее считается p95, выросший больше чем на threshold (доля) и
+    хотя бы на min_delta_ms, а также любой рост числа SQL-запросов.
+    """
+    regressions = []
+    for size, views in results.items():
+        for name, current in views.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            delta = current['p95_ms'] - previous['p95_ms']
+            if (delta > min_delta_ms
+                    and delta > previous['p95_ms'] * threshold):
+                regressions.append(
+                    f'{size}/{name}: p95 {previous["p95_ms"]} → '
+                    f'{current["p95_ms"]} мс'
+                )
+            if current['queries'] > previous['queries']:
+                regressions.append(
+                    f'{size}/{name}: запросов {previous["queries"]} → '
+                    f'{current["queries"]}'
+                )
+    return regressions
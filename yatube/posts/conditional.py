@@ -0,0 +1,87 @@
+"""Условные GET-запросы (ETag / Last-Modified) для лент и поста.
+
+Валидаторы считаются до основного запроса:
+- ленты (главная, группа) — момент последнего изменения постов из общего
+  кэша (feed_cache.posts_changed_at), без запросов к базе; он двигается
+  и при удалении поста;
+- профиль — он же плюс момент изменения счётчиков автора (AuthorStats),
+  а в ETag — подписан ли читатель на автора и его рекомендации;
+- пост — updated поста (его меняют и комментарии) и счётчиков автора,
+  одним запросом.
+
+ETag всех страниц включает пользователя и поколение его подписок, потому
+что страницы для разных пользователей отличаются.
+"""
+from datetime import datetime
+import zlib
+
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from . import feed_cache, follow_graph
+from .models import AuthorStats, Post
+from .recommendations import suggestions_for
+
+
+def _moment(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def conditional_page(validators):
+    """Декоратор: validators(request, *args, **kwargs) вьюхи возвращает
+    (момент изменения, дополнительные части ETag) или None.
+    """
+    def compute(request, *args, **kwargs):
+        if not hasattr(request, '_validators'):
+            request._validators = validators(request, *args, **kwargs)
+        return request._validators
+
+    def last_modified(request, *args, **kwargs):
+        computed = compute(request, *args, **kwargs)
+        return computed and computed[0]
+
+    def etag(request, *args, **kwargs):
+        computed = compute(request, *args, **kwargs)
+        if computed is None:
+            return None
+        changed, parts = computed
+        user_id = request.user.pk or 0
+        follows = feed_cache.user_generation(user_id) if user_id else 0
+        return '-'.join(map(str, [
+            user_id, follows, int(changed.timestamp() * 10 ** 6), *parts,
+        ]))
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def feed_page(request, *args, **kwargs):
+    return _moment(feed_cache.posts_changed_at()), ()
+
+
+def author_page(request, username):
+    stats = AuthorStats.objects.filter(
+        user__username=username
+    ).values_list('user_id', 'updated').first()
+    if stats is None:
+        return None
+    author_id, stats_updated = stats
+    changed = max(_moment(feed_cache.posts_changed_at()), stats_updated)
+    if not request.user.is_authenticated:
+        return changed, ()
+    viewer_id = request.user.pk
+    suggested = ','.join(
+        str(author.pk) for author in suggestions_for(viewer_id)
+    )
+    return changed, (
+        int(follow_graph.is_following(viewer_id, author_id)),
+        zlib.crc32(suggested.encode()),
+    )
+
+
+def post_page(request, post_id):
+    moments = Post.objects.filter(pk=post_id).values_list(
+        'updated', 'author__stats__updated'
+    ).first()
+    if moments is None:
+        return None
+    return max(filter(None, moments)), ()
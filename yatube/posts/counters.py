@@ -0,0 +1,84 @@
+"""Денормализованные счётчики постов, комментариев и подписок."""
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import AuthorStats, Comment, Follow, Post
+
+USER_COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+}
+
+
+def change_user(user_id, **deltas):
+    AuthorStats.objects.filter(user_id=user_id).update(
+        updated=timezone.now(),
+        **{field: F(field) + delta for field, delta in deltas.items()},
+    )
+
+
+def change_comments(post_id, delta):
+    # Комментарии — часть страницы поста, поэтому меняют и её updated.
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta,
+        updated=timezone.now(),
+    )
+
+
+def _count_by(model, field, ids):
+    # order_by() сбрасывает Meta.ordering: иначе Django добавит поля
+    # сортировки в GROUP BY и каждая строка окажется отдельной группой.
+    return dict(
+        model.objects.filter(**{f'{field}__in': ids})
+        .order_by()
+        .values_list(field)
+        .annotate(total=Count('pk'))
+    )
+
+
+def recount_users(user_ids):
+    """Пересчитывает счётчики пользователей, возвращает число исправленных."""
+    actual = {
+        field: _count_by(model, lookup, user_ids)
+        for field, (model, lookup) in USER_COUNTERS.items()
+    }
+    existing = AuthorStats.objects.in_bulk(user_ids)
+    created, drifted = [], []
+    for user_id in user_ids:
+        values = {
+            field: counts.get(user_id, 0) for field, counts in actual.items()
+        }
+        stats = existing.get(user_id)
+        if stats is None:
+            created.append(AuthorStats(user_id=user_id, **values))
+        elif any(getattr(stats, f) != v for f, v in values.items()):
+            for field, value in values.items():
+                setattr(stats, field, value)
+            stats.updated = timezone.now()
+            drifted.append(stats)
+    AuthorStats.objects.bulk_create(created, ignore_conflicts=True)
+    AuthorStats.objects.bulk_update(drifted, [*USER_COUNTERS, 'updated'])
+    return len(created) + len(drifted)
+
+
+def recount_comments(post_ids):
+    """Пересчитывает comments_count постов, возвращает число исправленных."""
+    actual = _count_by(Comment, 'post', post_ids)
+    drifted = []
+    for post in Post.objects.filter(pk__in=post_ids).only('comments_count'):
+        count = actual.get(post.pk, 0)
+        if post.comments_count != count:
+            post.comments_count = count
+            drifted.append(post)
+    Post.objects.bulk_update(drifted, ('comments_count',))
+    return len(drifted)
+
+
+def stats_for(user):
+    """Счётчики пользователя; при первом обращении они пересчитываются."""
+    stats = AuthorStats.objects.filter(user=user).first()
+    if stats is None:
+        recount_users([user.pk])
+        stats = AuthorStats.objects.get(user=user)
+    return stats
@@ -0,0 +1,86 @@
+"""Версионированный кэш фрагментов ленты.
+
+Ключ фрагмента включает тип ленты, её владельца, страницу (номер или
+курсор) и счётчики поколений. Любое изменение постов увеличивает общее
+поколение, изменение подписок — поколение конкретного читателя, поэтому
+старые фрагменты просто перестают запрашиваться и TTL можно держать большим.
+
+Счётчики живут в общем для воркеров кэше (core.checks не пропустит кэш в
+памяти процесса без DEBUG): сдвиг поколения в одном воркере сразу меняет
+ключи во всех, и устаревший фрагмент больше никому не отдаётся.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+POSTS_GENERATION_KEY = 'feed:generation:posts'
+POSTS_CHANGED_KEY = 'feed:posts_changed_at'
+USER_GENERATION_KEY = 'feed:generation:user:{}'
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def _initial_generation():
+    # Если счётчик вытеснили из кэша, новое значение должно быть больше
+    # любого прежнего, иначе всплывут старые фрагменты.
+    return int(time.time() * 1000)
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_generation(), None)
+
+
+def _generations(*keys):
+    values = cache.get_many(keys)
+    missing = {
+        key: _initial_generation() for key in keys if key not in values
+    }
+    if missing:
+        cache.set_many(missing, None)
+        values.update(missing)
+    return [values[key] for key in keys]
+
+
+def bump_posts():
+    _bump(POSTS_GENERATION_KEY)
+    cache.set(POSTS_CHANGED_KEY, time.time(), None)
+
+
+def posts_changed_at():
+    """Момент последнего изменения постов (для Last-Modified лент)."""
+    changed = cache.get(POSTS_CHANGED_KEY)
+    if changed is None:
+        # Отметку вытеснили: что менялось, неизвестно, считаем — сейчас.
+        changed = time.time()
+        if not cache.add(POSTS_CHANGED_KEY, changed, None):
+            changed = cache.get(POSTS_CHANGED_KEY, changed)
+    return changed
+
+
+def bump_user(user_id):
+    _bump(USER_GENERATION_KEY.format(user_id))
+
+
+def user_generation(user_id):
+    return _generations(USER_GENERATION_KEY.format(user_id))[0]
+
+
+def feed_cache_key(request, feed, scope=''):
+    """Часть ключа для `{% cache %}`, уникальная для страницы ленты."""
+    keys = [POSTS_GENERATION_KEY]
+    if feed == 'follow':
+        scope = request.user.pk
+        keys.append(USER_GENERATION_KEY.format(scope))
+    generations = _generations(*keys)
+    page = [request.GET.get(param, '') for param in PAGE_PARAMS]
+    return ':'.join(map(str, [feed, scope, *generations, *page]))
+
+
+def feed_cache_context(request, feed, scope=''):
+    return {
+        'feed_cache_key': feed_cache_key(request, feed, scope),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,283 @@
+"""Потоковый импорт постов, комментариев и подписок.
+
+Записи читаются генератором из JSONL или CSV вместе с номером строки,
+накапливаются в пачки и вставляются через bulk_create в одной транзакции
+вместе с позицией источника, поэтому после падения импорт продолжается с
+последней закоммиченной пачки. Сигналы при bulk_create не срабатывают, и
+производные данные (счётчики, поисковый индекс, ленты, миниатюры)
+обновляются пачкой.
+
+Посты получают новые локальные id; id из источника сохраняется в
+ImportedPost рядом с позицией, по нему комментарии находят свой пост, а
+повтор пачки не создаёт пост второй раз. Запись с ошибкой останавливает
+импорт с номером строки.
+
+Формат записи (в CSV — одноимённые колонки):
+    {"type": "post", "id": 10, "author": "leo", "text": "...",
+     "group": "slug", "pub_date": "2022-11-01T10:00:00Z", "image": "..."}
+    {"type": "comment", "post": 10, "author": "anna", "text": "...",
+     "created": "..."}
+    {"type": "follow", "user": "anna", "author": "leo"}
+"""
+from collections import Counter
+from contextlib import contextmanager
+import csv
+import json
+
+from django.db import DataError, IntegrityError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from search.index import index_posts
+
+from . import counters, feed_cache, follow_graph, timeline
+from .models import (
+    Comment, Follow, Group, ImportCheckpoint, ImportedPost, Post, User,
+)
+from .thumbnails import queue_images
+
+RECORD_TYPES = ('post', 'comment', 'follow')
+
+
+class ImportRecordError(ValueError):
+    """Запись не удалось разобрать."""
+
+
+def read_jsonl(stream):
+    """Пары (номер строки, запись)."""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as error:
+            raise ImportRecordError(f'Строка {number}: {error}')
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {
+            key: value for key, value in row.items() if value != ''
+        }
+
+
+@contextmanager
+def record_errors(line):
+    """Ошибки разбора записи — ImportRecordError с номером строки."""
+    try:
+        yield
+    except KeyError as error:
+        raise ImportRecordError(f'Строка {line}: нет поля {error}')
+    except ValueError as error:
+        raise ImportRecordError(f'Строка {line}: {error}')
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def parse_moment(value):
+    if not value:
+        return timezone.now()
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ImportRecordError(f'Неверная дата: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.utc)
+    return moment
+
+
+@contextmanager
+def imported_dates():
+    """Отключает auto_now/auto_now_add, чтобы сохранить даты из источника.
+    """
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    def __init__(self, source):
+        self.source = source
+        self.users = {}
+        self.groups = {}
+
+    def user_id(self, username):
+        if not username:
+            raise ImportRecordError('Не указан пользователь')
+        if username not in self.users:
+            user, created = User.objects.get_or_create(username=username)
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=('password',))
+            self.users[username] = user.pk
+        return self.users[username]
+
+    def group_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            self.groups[slug] = Group.objects.get_or_create(
+                slug=slug, defaults={'title': slug, 'description': ''}
+            )[0].pk
+        return self.groups[slug]
+
+    def position(self):
+        checkpoint = ImportCheckpoint.objects.filter(
+            source=self.source
+        ).first()
+        return checkpoint.position if checkpoint else 0
+
+    def import_batch(self, records, position):
+        """Вставляет пачку пар (строка, запись) и сдвигает позицию в одной
+        транзакции.
+        """
+        by_type = {record_type: [] for record_type in RECORD_TYPES}
+        for line, record in records:
+            if record.get('type') not in by_type:
+                raise ImportRecordError(
+                    f'Строка {line}: неизвестный тип записи {record}'
+                )
+            by_type[record['type']].append((line, record))
+        try:
+            with transaction.atomic(), imported_dates():
+                # Первая запись транзакции: дальше SQLite не пустит других
+                # писателей, и выделенные id постов не займёт никто другой.
+                checkpoint = ImportCheckpoint.objects.update_or_create(
+                    source=self.source, defaults={'position': position}
+                )[0]
+                posts = self._posts(checkpoint, by_type['post'])
+                comments = self._comments(checkpoint, by_type['comment'])
+                follows = self._follows(by_type['follow'])
+                self._derived(posts, comments, follows)
+        except (DataError, IntegrityError) as error:
+            raise ImportRecordError(
+                f'Строки {records[0][0]}–{records[-1][0]}: {error}'
+            )
+        return len(posts) + len(comments) + len(follows)
+
+    def _posts(self, checkpoint, records):
+        if not records:
+            return []
+        imported = set(checkpoint.posts.filter(
+            source_id__in=[str(record['id'])
+                           for _, record in records if record.get('id')]
+        ).values_list('source_id', flat=True))
+        posts, source_ids = [], []
+        for line, record in records:
+            source_id = str(record['id']) if record.get('id') else None
+            # Уже импортированные посты (повтор пачки) пропускаются.
+            if source_id in imported:
+                continue
+            with record_errors(line):
+                pub_date = parse_moment(record.get('pub_date'))
+                posts.append(Post(
+                    text=record.get('text', ''),
+                    author_id=self.user_id(record.get('author')),
+                    group_id=self.group_id(record.get('group')),
+                    image=record.get('image', ''),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                ))
+            source_ids.append(source_id)
+            if source_id is not None:
+                imported.add(source_id)
+        self._insert_posts(posts)
+        ImportedPost.objects.bulk_create([
+            ImportedPost(
+                checkpoint=checkpoint, source_id=source_id, post_id=post.pk
+            )
+            for source_id, post in zip(source_ids, posts)
+            if source_id is not None
+        ])
+        return posts
+
+    def _insert_posts(self, posts):
+        """bulk_create, после которого у всех постов есть pk."""
+        if not connection.features.can_return_ids_from_bulk_insert:
+            next_id = (
+                Post.objects.aggregate(last=Max('pk'))['last'] or 0
+            ) + 1
+            for number, post in enumerate(posts):
+                post.pk = next_id + number
+        Post.objects.bulk_create(posts)
+
+    def _comments(self, checkpoint, records):
+        if not records:
+            return []
+        post_ids = dict(checkpoint.posts.filter(
+            source_id__in={str(record.get('post')) for _, record in records}
+        ).values_list('source_id', 'post_id'))
+        comments = []
+        for line, record in records:
+            with record_errors(line):
+                post_id = post_ids.get(str(record['post']))
+                if post_id is None:
+                    raise ImportRecordError(
+                        f'нет поста {record["post"]} в источнике'
+                    )
+                comments.append(Comment(
+                    post_id=post_id,
+                    author_id=self.user_id(record.get('author')),
+                    text=record.get('text', ''),
+                    created=parse_moment(record.get('created')),
+                ))
+        Comment.objects.bulk_create(comments)
+        return comments
+
+    def _follows(self, records):
+        pairs = set()
+        for line, record in records:
+            with record_errors(line):
+                pairs.add((
+                    self.user_id(record.get('user')),
+                    self.user_id(record.get('author')),
+                ))
+        pairs = {(user, author) for user, author in pairs if user != author}
+        if not pairs:
+            return []
+        existing = set(Follow.objects.filter(
+            user_id__in={user for user, _ in pairs},
+            author_id__in={author for _, author in pairs},
+        ).values_list('user_id', 'author_id'))
+        follows = [
+            Follow(user_id=user, author_id=author)
+            for user, author in pairs - existing
+        ]
+        Follow.objects.bulk_create(follows)
+        return follows
+
+    def _derived(self, posts, comments, follows):
+        user_deltas = {}
+        for field, ids in (
+            ('posts_count', [post.author_id for post in posts]),
+            ('followers_count', [follow.author_id for follow in follows]),
+            ('following_count', [follow.user_id for follow in follows]),
+        ):
+            for user_id, delta in Counter(ids).items():
+                user_deltas.setdefault(user_id, {})[field] = delta
+        for user_id, deltas in user_deltas.items():
+            counters.change_user(user_id, **deltas)
+        counters.recount_comments(
+            list({comment.post_id for comment in comments})
+        )
+        index_posts((post.pk, post.text) for post in posts)
+        queue_images(post.image.name for post in posts if post.image)
+        timeline.fan_out_posts(posts)
+        if posts:
+            feed_cache.bump_posts()
+        follow_graph.forget({follow.user_id for follow in follows})
+        timeline.backfill_pairs(
+            (follow.user_id, follow.author_id) for follow in follows
+        )
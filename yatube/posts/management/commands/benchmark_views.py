@@ -0,0 +1,92 @@
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import (
+    UnexpectedStatus, compare, measure_views, scratch_database, seed_size,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки страниц posts на засеянных тестовых базах '
+        'нескольких размеров'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='100,1000',
+            help='Размеры базы в пользователях через запятую',
+        )
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument('--output', help='Куда записать JSON')
+        parser.add_argument('--compare', help='JSON с базовыми замерами')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый относительный рост p95',
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=2.0,
+            help='Рост p95 в мс, который ещё считается шумом',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes: ожидаются целые числа')
+        results = {}
+        with scratch_database():
+            for size in sizes:
+                results[str(size)] = self.run_size(size, options)
+        report = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(report)
+        else:
+            self.stdout.write(report)
+        if options['compare']:
+            self.compare(results, options)
+
+    def run_size(self, size, options):
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+        self.stderr.write(f'Засеваем базу на {size} пользователей')
+        seed_size(size, options['seed'])
+        try:
+            views = measure_views(
+                options['repeat'],
+                options['warmup'],
+                cache.clear if options['cold'] else None,
+            )
+        except UnexpectedStatus as error:
+            raise CommandError(error)
+        for name, result in views.items():
+            self.stderr.write(
+                f'{size:>7} {name:<18} {result["status"]} '
+                f'p50 {result["p50_ms"]:>8} '
+                f'p95 {result["p95_ms"]:>8} p99 {result["p99_ms"]:>8} мс, '
+                f'запросов {result["queries"]}, байт {result["bytes"]}'
+            )
+        return views
+
+    def compare(self, results, options):
+        with open(options['compare'], encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        regressions = compare(
+            results, baseline, options['threshold'], options['min_delta']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базовых замеров:\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
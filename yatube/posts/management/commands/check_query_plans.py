@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import scratch_database, seed_size
+from posts.query_plans import ALLOWED_SCANS, check_views
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет EXPLAIN QUERY PLAN запросов каждой страницы и падает, '
+        'если какой-то запрос читает таблицу целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=200,
+            help='Размер засеянной тестовой базы',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--allow', action='append', default=[],
+            help='Таблица, полный проход по которой допустим',
+        )
+        parser.add_argument(
+            '--show-plans', action='store_true',
+            help='Печатать планы всех запросов',
+        )
+
+    def handle(self, *args, **options):
+        allowed = ALLOWED_SCANS | set(options['allow'])
+        with scratch_database():
+            cache.clear()
+            seed_size(options['users'], options['seed'])
+            report = check_views(allowed)
+        failures = 0
+        for name, queries in report.items():
+            self.stdout.write(f'{name}: запросов {len(queries)}')
+            for sql, plan, scans in queries:
+                if scans:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(
+                        f'  полный проход по {", ".join(scans)}: {sql}'
+                    ))
+                if scans or options['show_plans']:
+                    for detail in plan:
+                        self.stdout.write(f'    {detail}')
+        if failures:
+            raise CommandError(f'Запросов с полным проходом: {failures}')
+        self.stdout.write(self.style.SUCCESS('Полных проходов нет'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import SIZE, WINDOW, compute
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги популярных постов сайта и групп; '
+        'запускается периодически (cron)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int, default=WINDOW,
+            help='За сколько последних часов брать посты и комментарии',
+        )
+        parser.add_argument(
+            '--size', type=int, default=SIZE,
+            help='Длина каждого рейтинга',
+        )
+
+    def handle(self, *args, window, size, **options):
+        lists = compute(window=window, size=size)
+        self.stdout.write(f'Рейтингов сохранено: {lists}')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import CHUNK_SIZE, FORMATS, export_lines
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты автора в CSV или JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', help='Файл, по умолчанию stdout')
+        parser.add_argument('--comments', action='store_true')
+        parser.add_argument('--images', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, username, output, **options):
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise CommandError(f'Пользователь {username} не найден')
+        lines = export_lines(
+            author,
+            options['format'],
+            comments=options['comments'],
+            images=options['images'],
+            chunk_size=options['chunk_size'],
+        )
+        if output is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            stream.writelines(lines)
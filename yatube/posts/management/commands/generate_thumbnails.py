@@ -0,0 +1,56 @@
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import QUEUE, queue_images
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует миниатюры из очереди в пуле процессов '
+        '(run_workers только для очереди миниатюр)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Размер пула; 0 — обрабатывать в текущем процессе',
+        )
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новых задач',
+        )
+        parser.add_argument('--interval', type=float, default=2.0)
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Сначала поставить в очередь картинки постов без миниатюр',
+        )
+
+    def handle(self, *args, processes, batch_size, loop, interval, missing,
+               **opts):
+        if missing:
+            names = (
+                Post.objects.filter(thumbnails_ready=False)
+                .exclude(image='')
+                .values_list('image', flat=True)
+                .distinct()
+                .order_by()
+            )
+            queue_images(names)
+        call_command(
+            'run_workers',
+            workers=processes,
+            mode='process',
+            queues=[QUEUE],
+            batch_size=batch_size,
+            burst=not loop,
+            interval=interval,
+            stdout=self.stdout,
+        )
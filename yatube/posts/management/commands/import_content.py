@@ -0,0 +1,50 @@
+from itertools import islice
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import READERS, Importer, ImportRecordError
+
+
+class Command(BaseCommand):
+    help = 'Потоково импортирует посты, комментарии и подписки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=READERS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--source',
+            help='Имя источника для возобновления, по умолчанию — путь',
+        )
+
+    def handle(self, *args, path, batch_size, **options):
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        importer = Importer(options['source'] or os.path.abspath(path))
+        position = importer.position()
+        if position:
+            self.stdout.write(f'Продолжаем с записи {position}')
+        started, imported = time.monotonic(), 0
+        with open(path, encoding='utf-8', newline='') as stream:
+            records = islice(READERS[file_format](stream), position, None)
+            try:
+                while True:
+                    batch = list(islice(records, batch_size))
+                    if not batch:
+                        break
+                    position += len(batch)
+                    imported += importer.import_batch(batch, position)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'{position} записей, вставлено {imported}, '
+                        f'{imported / elapsed:.0f} строк/с'
+                    )
+            except ImportRecordError as error:
+                raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: вставлено {imported} за '
+            f'{time.monotonic() - started:.1f} с'
+        ))
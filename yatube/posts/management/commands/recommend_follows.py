@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import MAX_PAIRS, TOP_K, recommend
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по графу '
+        'подписок и группам'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=TOP_K,
+            help='Сколько рекомендаций хранить на пользователя',
+        )
+        parser.add_argument(
+            '--max-pairs', type=int, default=MAX_PAIRS,
+            help='Предел промежуточных пар в пачке (бюджет памяти)',
+        )
+
+    def handle(self, *args, top_k, max_pairs, verbosity, **options):
+        started = time.perf_counter()
+        log = self.stdout.write if verbosity > 1 else None
+        users = recommend(top_k=top_k, max_pairs=max_pairs, log=log)
+        self.stdout.write(
+            f'Рекомендации для {users} пользователей за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
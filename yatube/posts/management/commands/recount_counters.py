@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_comments, recount_users
+from posts.models import Post, User
+
+
+def batches(queryset, size):
+    """Идентификаторы из queryset порциями, без OFFSET."""
+    last_pk = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и чинит расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        users = sum(
+            recount_users(ids)
+            for ids in batches(User.objects.all(), batch_size)
+        )
+        posts = sum(
+            recount_comments(ids)
+            for ids in batches(Post.objects.all(), batch_size)
+        )
+        self.stdout.write(
+            f'Исправлено счётчиков: пользователей {users}, постов {posts}'
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу правдоподобными данными со степенными законами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=30000)
+        parser.add_argument(
+            '--images', type=int, default=10,
+            help='Сколько разных картинок сгенерировать для постов',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--alpha', type=float, default=1.5,
+            help='Показатель Парето: чем меньше, тем тяжелее хвост',
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            options['seed'],
+            alpha=options['alpha'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        )
+        created = seeder.run(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            images=options['images'],
+        )
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{name}: {count}' for name, count in created.items()
+        )))
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThumbnailJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=255, verbose_name='Исходное изображение')),
+                ('geometry', models.CharField(max_length=32, verbose_name='Геометрия')),
+                ('options', models.TextField(verbose_name='Опции sorl в JSON')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Поставлена в очередь')),
+            ],
+            options={
+                'verbose_name': 'Задача на миниатюру',
+                'verbose_name_plural': 'Задачи на миниатюры',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='thumbnailjob',
+            constraint=models.UniqueConstraint(fields=('source', 'geometry', 'options'), name='unique_thumbnail_job'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def deduplicate_follows(apps, schema_editor):
+    """Оставляет по одной подписке на пару (user, author), пачками."""
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    duplicates = (
+        Follow.objects.order_by()
+        .values('user', 'author')
+        .annotate(keep=models.Min('pk'), total=models.Count('pk'))
+        .filter(total__gt=1)
+        .values_list('user', 'author', 'keep')
+    )
+    touched = set()
+    while True:
+        batch = list(duplicates[:BATCH_SIZE])
+        if not batch:
+            break
+        for user_id, author_id, keep in batch:
+            Follow.objects.filter(
+                user_id=user_id, author_id=author_id
+            ).exclude(pk=keep).delete()
+            touched.update((user_id, author_id))
+    # Дубли завышали счётчики подписок, пересчитываем затронутых.
+    for user_id in touched:
+        AuthorStats.objects.filter(user_id=user_id).update(
+            followers_count=Follow.objects.filter(author_id=user_id).count(),
+            following_count=Follow.objects.filter(user_id=user_id).count(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_date'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_date'),
+        ),
+        migrations.RunPython(deduplicate_follows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
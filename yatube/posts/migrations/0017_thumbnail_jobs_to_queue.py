@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:05
+
+import json
+
+from django.db import migrations
+from django.utils import timezone
+from sorl.thumbnail.helpers import tokey
+
+BATCH_SIZE = 1000
+
+
+def move_thumbnail_jobs(apps, schema_editor):
+    """Переносит ждущие миниатюры в общую очередь фоновых задач."""
+    ThumbnailJob = apps.get_model('posts', 'ThumbnailJob')
+    Job = apps.get_model('core', 'Job')
+    now = timezone.now()
+    rows = ThumbnailJob.objects.order_by('pk').values_list(
+        'pk', 'source', 'geometry', 'options'
+    )
+    last = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            break
+        Job.objects.bulk_create(
+            [
+                Job(
+                    queue='thumbnails',
+                    task='posts.thumbnails.generate',
+                    arguments=json.dumps([[source, geometry, options], {}]),
+                    run_at=now,
+                    dedup_key='thumbnail:' + tokey(source, geometry, options),
+                    max_attempts=5,
+                )
+                for _, source, geometry, options in batch
+            ],
+            ignore_conflicts=True,
+        )
+        last = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0016_trendinglist'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_thumbnail_jobs, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ThumbnailJob',
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_authorstats_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name='Миниатюры готовы'
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_importedpost'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='authorstats',
+            name='followers_count',
+            field=models.IntegerField(db_index=True, default=0, verbose_name='Подписчиков'),
+        ),
+    ]
@@ -21,6 +21,9 @@ class Post(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
     group = models.ForeignKey(
         Group,
         blank=True,
@@ -43,11 +46,34 @@ class Post(models.Model):
         blank=True,
         help_text='Вставьте изображение'
     )
+    comments_count = models.IntegerField(
+        'Количество комментариев', default=0, editable=False
+    )
+    thumbnails_ready = models.BooleanField(
+        'Миниатюры готовы', default=False, editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('group', 'updated'), name='post_group_updated'
+            ),
+            models.Index(
+                fields=('author', 'updated'), name='post_author_updated'
+            ),
+            # Ленты группы и профиля: фильтр по FK и порядок пагинатора
+            # (-pub_date, -id) читаются одним проходом по индексу.
+            models.Index(
+                fields=('group', '-pub_date', '-id'), name='post_group_date'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_date',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -74,6 +100,12 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Коммент'
         verbose_name_plural = 'Комменты'
+        indexes = (
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created',
+            ),
+        )
 
     def __str__(self):
         return self.text
@@ -96,6 +128,184 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_follow'
+            ),
+        )
 
     def __str__(self):
         return f'{self.user} following {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписчика.
+
+    Заполняется при публикации (fan-out on write), поэтому лента подписок
+    читается одним диапазоном по индексу (user, -pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель ленты',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор поста',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-id'),
+                name='timeline_user_date',
+            ),
+            models.Index(
+                fields=('user', 'author'), name='timeline_user_author'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post_id} in feed of {self.user_id}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики пользователя.
+
+    Поддерживаются сигналами через F()-обновления, расхождения чинит
+    команда `recount_counters`.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.IntegerField('Постов', default=0)
+    followers_count = models.IntegerField(
+        'Подписчиков', default=0, db_index=True
+    )
+    following_count = models.IntegerField('Подписок', default=0)
+    updated = models.DateTimeField('Изменены', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'stats of {self.user_id}'
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже импортировано командой import_content.
+    """
+    source = models.CharField('Источник', max_length=255, unique=True)
+    position = models.PositiveIntegerField('Обработано записей', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Позиция импорта'
+        verbose_name_plural = 'Позиции импорта'
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
+
+
+class ImportedPost(models.Model):
+    """Пост источника импорта: id в источнике → локальный пост.
+
+    Локальные id выделяются заново, id источника с ними не совпадают, и
+    комментарии источника находят свои посты по этой таблице.
+    """
+    checkpoint = models.ForeignKey(
+        ImportCheckpoint,
+        on_delete=models.CASCADE,
+        related_name='posts',
+        verbose_name='Источник',
+    )
+    source_id = models.CharField('Id в источнике', max_length=255)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Пост',
+    )
+
+    class Meta:
+        verbose_name = 'Импортированный пост'
+        verbose_name_plural = 'Импортированные посты'
+        unique_together = ('checkpoint', 'source_id')
+
+    def __str__(self):
+        return f'{self.source_id} → {self.post_id}'
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться, с оценкой.
+
+    Пересчитывается целиком командой `recommend_follows`; строки прошлых
+    запусков (computed раньше текущего) удаляются в её конце.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Читатель',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.FloatField('Оценка')
+    computed = models.DateTimeField('Рассчитано')
+
+    class Meta:
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        indexes = (
+            models.Index(
+                fields=('user', '-score'), name='suggestion_user_score'
+            ),
+            models.Index(fields=('computed',), name='suggestion_computed'),
+        )
+
+    def __str__(self):
+        return f'{self.author_id} for {self.user_id}'
+
+
+class TrendingList(models.Model):
+    """Готовый рейтинг популярных постов сайта или одной группы.
+
+    Пишется целиком командой `compute_trending`, страницы читают его
+    одной строкой (обычно — из кэша).
+    """
+    scope = models.CharField('Область', max_length=64, unique=True)
+    post_ids = models.TextField('id постов по убыванию оценки', blank=True)
+    computed = models.DateTimeField('Рассчитано')
+
+    class Meta:
+        verbose_name = 'Рейтинг популярного'
+        verbose_name_plural = 'Рейтинги популярного'
+
+    def __str__(self):
+        return self.scope
@@ -0,0 +1,89 @@
+"""Проверка планов SQL-запросов страниц через EXPLAIN QUERY PLAN.
+
+Все страницы, которые замеряет benchmark, запрашиваются тестовым
+клиентом, их SELECT-запросы перехватываются и объясняются планировщиком
+SQLite. Полный проход по таблице («SCAN table» без индекса) считается
+ошибкой, если таблица не в списке разрешённых.
+"""
+from contextlib import ExitStack, contextmanager
+import re
+
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from .benchmark import sample_kwargs, view_urls
+from .models import Post
+
+# Список групп для выбора в форме поста читается целиком намеренно.
+ALLOWED_SCANS = frozenset({'posts_group'})
+SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(.*)$')
+NOT_TABLES = frozenset({'CONSTANT', 'SUBQUERY'})
+
+
+class QueryCollector:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def collect_queries():
+    collector = QueryCollector()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(
+                connections[alias].execute_wrapper(collector)
+            )
+        yield collector.queries
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan, allowed=ALLOWED_SCANS):
+    scans = []
+    for detail in plan:
+        match = SCAN.match(detail)
+        if match is None:
+            continue
+        table, rest = match.groups()
+        if table in NOT_TABLES or table in allowed or 'USING' in rest:
+            continue
+        scans.append(table)
+    return scans
+
+
+def page_urls():
+    """Страницы posts и поиск, с параметрами из данных."""
+    reader, kwargs = sample_kwargs()
+    urls = view_urls(kwargs)
+    post = Post.objects.order_by('-pk').first()
+    if post is not None and post.text.split():
+        query = post.text.split()[0]
+        urls.append(('search', f'{reverse("search:search")}?q={query}'))
+    return reader, urls
+
+
+def check_views(allowed=ALLOWED_SCANS):
+    """Словарь имя страницы → список (SQL, план, полные проходы)."""
+    reader, urls = page_urls()
+    client = Client()
+    if reader is not None:
+        client.force_login(reader)
+    report = {}
+    for name, url in urls:
+        with collect_queries() as queries:
+            client.get(url)
+        report[name] = []
+        for sql, params in queries:
+            plan = explain(sql, params)
+            report[name].append((sql, plan, full_scans(plan, allowed)))
+    return report
@@ -0,0 +1,327 @@
+"""Рекомендации «на кого подписаться» по графу подписок.
+
+Расчёт офлайн (`manage.py recommend_follows`), целиком на массивах NumPy:
+
+1. Рёбра Follow читаются потоком в два массива int64, id пользователей
+   сжимаются в плотные индексы, граф хранится в CSR в обе стороны
+   (подписки читателя и подписчики автора).
+2. Похожесть авторов — косинус по общим подписчикам. Для каждого автора
+   остаются NEIGHBOURS самых похожих.
+3. Оценка кандидата для читателя — сумма похожестей кандидата на авторов,
+   на которых он подписан (нормированная на максимум читателя), плюс
+   GROUP_WEIGHT × доля его подписок в основной группе кандидата. Читателям
+   без подписок достаются популярные авторы его основной группы.
+4. Для каждого читателя сохраняются TOP_K лучших в FollowSuggestion.
+
+Память ограничена: подписчиков автора и подписок читателя учитывается не
+больше MAX_DEGREE, а авторы и читатели обрабатываются пачками, в которых
+промежуточных пар не больше max_pairs. Полный граф в памяти — 16 байт на
+ребро, пары пачки — порядка 30 байт на пару.
+"""
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+import numpy as np
+
+from . import follow_graph
+from .models import AuthorStats, Follow, FollowSuggestion, Post
+
+TOP_K = 10
+NEIGHBOURS = 50
+MAX_DEGREE = 1000
+MAX_PAIRS = 4_000_000
+GROUP_WEIGHT = 0.3
+GROUP_POPULAR = 20
+READ_CHUNK = 10_000
+
+SUGGESTIONS_KEY = 'follow:suggestions:{}'
+
+
+def read_pairs(queryset, *fields):
+    """Два столбца queryset потоком в массив (n, 2) int64."""
+    rows = queryset.order_by().values_list(*fields).iterator(
+        chunk_size=READ_CHUNK
+    )
+    return np.fromiter(
+        chain.from_iterable(rows), dtype=np.int64
+    ).reshape(-1, 2)
+
+
+def csr(rows, cols, size, weights=None):
+    """CSR по строкам rows: (indptr, столбцы[, веса]) с сортировкой."""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    if weights is None:
+        return indptr, cols[order]
+    return indptr, cols[order], weights[order]
+
+
+def cap_rows(indptr, indices, limit):
+    """Оставляет в каждой строке не больше limit первых элементов."""
+    counts = np.diff(indptr)
+    offsets = np.arange(len(indices)) - np.repeat(indptr[:-1], counts)
+    keep = offsets < limit
+    capped = np.zeros_like(indptr)
+    np.cumsum(np.minimum(counts, limit), out=capped[1:])
+    return capped, indices[keep]
+
+
+def expand(indptr, rows):
+    """Позиции элементов строк rows: (номер строки в rows, позиция)."""
+    starts = indptr[rows]
+    counts = indptr[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, np.repeat(starts, counts) + np.arange(counts.sum()) - first
+
+
+def chunks_by_cost(cost, budget):
+    """Границы пачек подряд идущих строк с суммарной ценой до budget."""
+    total = np.cumsum(cost)
+    start = 0
+    while start < len(cost):
+        base = total[start - 1] if start else 0
+        end = int(np.searchsorted(total, base + budget, side='right'))
+        end = max(end, start + 1)
+        yield start, end
+        start = end
+
+
+def top_per_row(rows, cols, scores, limit):
+    """Не больше limit лучших (cols, scores) в каждой строке rows."""
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ranks = np.arange(len(rows)) - np.repeat(
+        starts, np.diff(np.r_[starts, len(rows)])
+    )
+    keep = ranks < limit
+    return rows[keep], cols[keep], scores[keep]
+
+
+class FollowGraph:
+    """Граф подписок в плотных индексах."""
+
+    def __init__(self, follows, posters, main_groups):
+        self.ids = np.unique(np.concatenate([
+            follows.ravel(), posters, main_groups[:, 0],
+        ]))
+        size = len(self.ids)
+        users = np.searchsorted(self.ids, follows[:, 0])
+        authors = np.searchsorted(self.ids, follows[:, 1])
+        self.following = csr(users, authors, size)
+        self.followers = csr(authors, users, size)
+        self.followers_count = np.diff(self.followers[0])
+        self.has_posts = np.zeros(size, dtype=bool)
+        self.has_posts[np.searchsorted(self.ids, posters)] = True
+        self.main_group = np.full(size, -1, dtype=np.int64)
+        self.main_group[
+            np.searchsorted(self.ids, main_groups[:, 0])
+        ] = main_groups[:, 1]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def load_graph():
+    follows = read_pairs(Follow.objects, 'user_id', 'author_id')
+    posters = np.fromiter(
+        AuthorStats.objects.filter(posts_count__gt=0).values_list(
+            'user_id', flat=True
+        ).iterator(chunk_size=READ_CHUNK),
+        dtype=np.int64,
+    )
+    counts = Post.objects.filter(group__isnull=False).order_by().values(
+        'author_id', 'group_id'
+    ).annotate(total=Count('pk')).values_list('author_id', 'group_id', 'total')
+    counts = np.array(list(counts), dtype=np.int64).reshape(-1, 3)
+    # Основная группа автора — та, где у него больше всего постов.
+    order = np.lexsort((counts[:, 1], -counts[:, 2], counts[:, 0]))
+    counts = counts[order]
+    _, first = np.unique(counts[:, 0], return_index=True)
+    return FollowGraph(follows, posters, counts[first, :2])
+
+
+def author_neighbours(graph, neighbours=NEIGHBOURS, max_degree=MAX_DEGREE,
+                      max_pairs=MAX_PAIRS):
+    """CSR автор → похожие авторы с косинусной похожестью."""
+    size = len(graph)
+    followers = cap_rows(*graph.followers, max_degree)
+    following = cap_rows(*graph.following, max_degree)
+    out_degree = np.diff(following[0])
+    cost = np.bincount(
+        np.repeat(np.arange(size), np.diff(followers[0])),
+        weights=out_degree[followers[1]],
+        minlength=size,
+    )
+    degree = np.sqrt(np.maximum(graph.followers_count, 1))
+    parts = []
+    for start, end in chunks_by_cost(cost, max_pairs):
+        authors = np.arange(start, end)
+        owners, positions = expand(followers[0], authors)
+        readers = followers[1][positions]
+        owners2, positions2 = expand(following[0], readers)
+        left = authors[owners[owners2]]
+        right = following[1][positions2]
+        same = left != right
+        keys, together = np.unique(
+            (left[same] - start) * size + right[same], return_counts=True
+        )
+        left, right = keys // size + start, keys % size
+        similarity = together / (degree[left] * degree[right])
+        parts.append(top_per_row(left, right, similarity, neighbours))
+    if not parts:
+        empty = np.zeros(0, dtype=np.int64)
+        return csr(empty, empty, size, np.zeros(0))
+    left, right, similarity = (np.concatenate(part) for part in zip(*parts))
+    return csr(left, right, size, similarity)
+
+
+def group_popular(graph, limit=GROUP_POPULAR):
+    """Самые популярные пишущие авторы каждой группы: (группы, авторы)."""
+    authors = np.flatnonzero((graph.main_group >= 0) & graph.has_posts)
+    groups, authors, _ = top_per_row(
+        graph.main_group[authors], authors,
+        graph.followers_count[authors].astype(float), limit,
+    )
+    return groups, authors
+
+
+def user_suggestions(graph, neighbours, top_k=TOP_K,
+                     group_weight=GROUP_WEIGHT, max_degree=MAX_DEGREE,
+                     max_pairs=MAX_PAIRS):
+    """Пачками выдаёт (читатели, авторы, оценки) в плотных индексах."""
+    size = len(graph)
+    width = int(graph.main_group.max()) + 1
+    following = cap_rows(*graph.following, max_degree)
+    popular = csr(*group_popular(graph), width)
+    cost = np.bincount(
+        np.repeat(np.arange(size), np.diff(following[0])),
+        weights=np.diff(neighbours[0])[following[1]],
+        minlength=size,
+    ) + GROUP_POPULAR
+    for start, end in chunks_by_cost(cost, max_pairs):
+        users = np.arange(start, end)
+        owners, positions = expand(following[0], users)
+        followed = following[1][positions]
+        followed_keys = owners * size + followed
+
+        # Совместные подписки: похожие на тех, на кого подписан читатель.
+        owners2, positions2 = expand(neighbours[0], followed)
+        keys, inverse = np.unique(
+            owners[owners2] * size + neighbours[1][positions2],
+            return_inverse=True,
+        )
+        cofollow = np.bincount(inverse, weights=neighbours[2][positions2])
+        best = np.zeros(len(users))
+        np.maximum.at(best, keys // size, cofollow)
+        cofollow = cofollow / np.maximum(best[keys // size], 1e-12)
+
+        # Профиль групп: основные группы авторов подписок и своя.
+        groups = np.concatenate([
+            graph.main_group[followed], graph.main_group[users],
+        ])
+        group_owners = np.concatenate([owners, np.arange(len(users))])
+        known = groups >= 0
+        group_keys, group_counts = np.unique(
+            group_owners[known] * width + groups[known],
+            return_counts=True,
+        )
+        totals = np.bincount(
+            group_owners[known], minlength=len(users)
+        ).astype(float)
+
+        # Читателям добавляются популярные авторы их основной группы.
+        if len(group_keys):
+            group_user = group_keys // width
+            order = np.lexsort((-group_counts, group_user))
+            heads = order[np.r_[True, np.diff(group_user[order]) != 0]]
+            owners3, positions3 = expand(
+                popular[0], group_keys[heads] % width
+            )
+            extra = (
+                group_user[heads][owners3] * size + popular[1][positions3]
+            )
+            extra = np.setdiff1d(extra, keys)
+            keys = np.concatenate([keys, extra])
+            cofollow = np.concatenate([cofollow, np.zeros(len(extra))])
+
+        readers, candidates = keys // size, keys % size
+        allowed = (
+            (users[readers] != candidates)
+            & graph.has_posts[candidates]
+            & ~np.isin(keys, followed_keys)
+        )
+        readers, candidates = readers[allowed], candidates[allowed]
+        scores = cofollow[allowed]
+        candidate_groups = graph.main_group[candidates]
+        if len(group_keys):
+            lookup = readers * width + candidate_groups
+            found = np.searchsorted(group_keys, lookup)
+            found = np.minimum(found, len(group_keys) - 1)
+            hits = (group_keys[found] == lookup) & (candidate_groups >= 0)
+            share = np.where(
+                hits, group_counts[found] / np.maximum(totals[readers], 1), 0
+            )
+            scores = scores + group_weight * share
+        readers, candidates, scores = top_per_row(
+            readers, candidates, scores, top_k
+        )
+        yield users[readers], candidates, scores
+
+
+def recommend(top_k=TOP_K, max_pairs=MAX_PAIRS, log=None):
+    """Пересчитывает FollowSuggestion всех пользователей."""
+    computed = timezone.now()
+    graph = load_graph()
+    if not len(graph):
+        FollowSuggestion.objects.all().delete()
+        return 0
+    neighbours = author_neighbours(graph, max_pairs=max_pairs)
+    total = 0
+    for users, authors, scores in user_suggestions(
+        graph, neighbours, top_k=top_k, max_pairs=max_pairs
+    ):
+        user_ids = graph.ids[users].tolist()
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__in=set(user_ids)
+            ).delete()
+            FollowSuggestion.objects.bulk_create(
+                FollowSuggestion(
+                    user_id=user_id, author_id=author_id,
+                    score=score, computed=computed,
+                )
+                for user_id, author_id, score in zip(
+                    user_ids, graph.ids[authors].tolist(), scores.tolist()
+                )
+            )
+        total += len(np.unique(users))
+        if log:
+            log(f'Пользователей с рекомендациями: {total}')
+    FollowSuggestion.objects.filter(computed__lt=computed).delete()
+    return total
+
+
+def suggestions_for(user_id, limit=5):
+    """Рекомендованные авторы без тех, на кого user уже подписан."""
+    key = SUGGESTIONS_KEY.format(user_id)
+    authors = cache.get(key)
+    if authors is None:
+        authors = [
+            suggestion.author for suggestion in
+            FollowSuggestion.objects.filter(user_id=user_id)
+            .select_related('author').order_by('-score')[:TOP_K]
+        ]
+        cache.set(key, authors, settings.FOLLOW_SUGGESTIONS_TIMEOUT)
+    followed = set(follow_graph.followed_among(
+        user_id, [author.pk for author in authors]
+    ))
+    return [
+        author for author in authors if author.pk not in followed
+    ][:limit]
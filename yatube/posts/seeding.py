@@ -0,0 +1,272 @@
+"""Генерация правдоподобных данных для нагрузочных замеров.
+
+Активность авторов, их популярность и обсуждаемость постов распределены по
+степенному закону (Парето): немногие авторы пишут и читаются много,
+большинство — почти никак. Все случайные величины берутся из одного
+генератора NumPy, тексты — из Faker с тем же зерном, поэтому на пустой базе
+одно и то же зерно даёт одни и те же данные. Записи вставляются пачками
+через bulk_create с заранее выданными id, производные данные (счётчики,
+поиск, ленты, миниатюры) обновляются пачками после вставки.
+"""
+from datetime import datetime, timedelta
+from io import BytesIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+import numpy as np
+from PIL import Image
+
+from search.index import index_posts
+
+from . import counters, feed_cache, follow_graph, timeline
+from .importing import imported_dates
+from .models import Comment, Follow, Group, Post, User
+from .thumbnails import queue_images
+
+# Интервал дат заканчивается фиксированным моментом, а не «сейчас»,
+# иначе данные зависели бы от дня запуска.
+SEED_UNTIL = datetime(2023, 1, 1, tzinfo=timezone.utc)
+SEED_PASSWORD = 'seed-password'
+SENTENCE_POOL = 2000
+IMAGE_SIZE = (960, 540)
+DAY = 24 * 60 * 60
+
+
+def power_law_weights(rng, size, alpha):
+    """Вероятности выбора элементов с хвостом Парето."""
+    weights = rng.pareto(alpha, size) + 1
+    return weights / weights.sum()
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def chunks(count, size):
+    """Диапазоны индексов [0, count) порциями по size."""
+    for start in range(0, count, size):
+        yield range(start, min(start + size, count))
+
+
+class Seeder:
+    def __init__(self, seed, alpha=1.5, days=365, batch_size=1000,
+                 until=SEED_UNTIL, log=None):
+        self.rng = np.random.default_rng(seed)
+        Faker.seed(seed)
+        self.faker = Faker('ru_RU')
+        self.seed = seed
+        self.alpha = alpha
+        self.span = days * DAY
+        self.batch_size = batch_size
+        self.until = until
+        self.log = log or (lambda message: None)
+
+    def run(self, users, groups, posts, comments, follows, images):
+        self.log(f'Зерно {self.seed}, пользователей {users}')
+        posting = power_law_weights(self.rng, users, self.alpha)
+        # Популярность связана с активностью: кто много пишет, того чаще
+        # читают, но множитель Парето оставляет место «звёздам».
+        popularity = posting * (self.rng.pareto(self.alpha, users) + 1)
+        popularity /= popularity.sum()
+        reading = power_law_weights(self.rng, users, self.alpha)
+
+        user_ids = self.create_users(users)
+        group_ids = self.create_groups(groups)
+        follow_count = self.create_follows(user_ids, reading, popularity,
+                                           follows)
+        image_names = self.create_images(images)
+        post_ids, post_authors, post_dates = self.create_posts(
+            user_ids, group_ids, posting, posts, image_names
+        )
+        comment_count = self.create_comments(
+            user_ids, reading, post_ids, popularity[post_authors],
+            post_dates, comments,
+        )
+        self.update_derived(user_ids, post_ids, image_names)
+        return {
+            'users': len(user_ids),
+            'groups': len(group_ids),
+            'follows': follow_count,
+            'posts': len(post_ids),
+            'comments': comment_count,
+        }
+
+    def moments(self, seconds_ago):
+        return [
+            self.until - timedelta(seconds=float(seconds))
+            for seconds in seconds_ago
+        ]
+
+    def insert(self, model, objects):
+        with transaction.atomic(), imported_dates():
+            model.objects.bulk_create(objects)
+
+    def create_users(self, count):
+        first_id = next_id(User)
+        password = make_password(SEED_PASSWORD)
+        joined = self.moments(self.rng.uniform(self.span, 2 * self.span,
+                                               count))
+        for chunk in chunks(count, self.batch_size):
+            self.insert(User, [
+                User(
+                    pk=first_id + index,
+                    username=f'{self.faker.user_name()}.{first_id + index}',
+                    first_name=self.faker.first_name(),
+                    last_name=self.faker.last_name(),
+                    password=password,
+                    date_joined=joined[index],
+                )
+                for index in chunk
+            ])
+        self.log(f'Пользователи: {count}')
+        return np.arange(first_id, first_id + count)
+
+    def create_groups(self, count):
+        first_id = next_id(Group)
+        self.insert(Group, [
+            Group(
+                pk=pk,
+                title=self.faker.word().capitalize(),
+                slug=f'group-{pk}',
+                description=self.faker.sentence(),
+            )
+            for pk in range(first_id, first_id + count)
+        ])
+        return np.arange(first_id, first_id + count)
+
+    def create_follows(self, user_ids, reading, popularity, count):
+        size = len(user_ids)
+        followers = self.rng.choice(size, count, p=reading)
+        authors = self.rng.choice(size, count, p=popularity)
+        pairs = np.unique(followers * size + authors)
+        followers, authors = np.divmod(pairs, size)
+        keep = followers != authors
+        followers, authors = user_ids[followers[keep]], user_ids[authors[keep]]
+        for chunk in chunks(len(followers), self.batch_size):
+            self.insert(Follow, [
+                Follow(
+                    user_id=int(followers[index]),
+                    author_id=int(authors[index]),
+                )
+                for index in chunk
+            ])
+        self.log(f'Подписки: {len(followers)}')
+        return len(followers)
+
+    def create_images(self, count):
+        """Небольшой набор градиентов, общий для всех постов с картинкой."""
+        names = []
+        width, height = IMAGE_SIZE
+        for number in range(count):
+            name = f'posts/seed-{self.seed}-{number}.jpg'
+            start, end = self.rng.integers(0, 256, (2, 3))
+            if not default_storage.exists(name):
+                ramp = np.linspace(0, 1, width)[None, :, None]
+                pixels = start + (end - start) * ramp
+                pixels = np.repeat(pixels, height, axis=0).astype(np.uint8)
+                content = BytesIO()
+                Image.fromarray(pixels).save(content, 'JPEG')
+                name = default_storage.save(name, ContentFile(
+                    content.getvalue()
+                ))
+            names.append(name)
+        return names
+
+    def create_posts(self, user_ids, group_ids, posting, count,
+                     image_names):
+        sentences = [
+            self.faker.sentence() for _ in range(SENTENCE_POOL)
+        ]
+        first_id = next_id(Post)
+        authors = self.rng.choice(len(user_ids), count, p=posting)
+        seconds_ago = self.rng.uniform(0, self.span, count)
+        dates = self.moments(seconds_ago)
+        groups = np.where(
+            self.rng.random(count) < 0.6,
+            self.rng.choice(
+                group_ids, count,
+                p=power_law_weights(self.rng, len(group_ids), self.alpha),
+            ) if len(group_ids) else 0,
+            0,
+        )
+        lengths = self.rng.integers(1, 8, count)
+        picks = self.rng.integers(0, SENTENCE_POOL, lengths.sum())
+        bounds = np.concatenate(([0], np.cumsum(lengths)))
+        images = np.full(count, -1)
+        if image_names:
+            with_image = self.rng.random(count) < 0.1
+            images[with_image] = self.rng.integers(
+                0, len(image_names), with_image.sum()
+            )
+        for chunk in chunks(count, self.batch_size):
+            self.insert(Post, [
+                Post(
+                    pk=first_id + index,
+                    author_id=int(user_ids[authors[index]]),
+                    group_id=int(groups[index]) or None,
+                    text=' '.join(
+                        sentences[pick]
+                        for pick in picks[bounds[index]:bounds[index + 1]]
+                    ),
+                    image=(image_names[images[index]]
+                           if images[index] >= 0 else ''),
+                    pub_date=dates[index],
+                    updated=dates[index],
+                )
+                for index in chunk
+            ])
+        self.log(f'Посты: {count}')
+        return np.arange(first_id, first_id + count), authors, seconds_ago
+
+    def create_comments(self, user_ids, reading, post_ids, post_weights,
+                        post_seconds_ago, count):
+        if not len(post_ids):
+            return 0
+        posts = self.rng.choice(
+            len(post_ids), count, p=post_weights / post_weights.sum()
+        )
+        commenters = self.rng.choice(len(user_ids), count, p=reading)
+        # Обсуждение затухает экспоненциально, в среднем за пару дней.
+        seconds_ago = np.maximum(
+            post_seconds_ago[posts] - self.rng.exponential(2 * DAY, count), 0
+        )
+        dates = self.moments(seconds_ago)
+        for chunk in chunks(count, self.batch_size):
+            self.insert(Comment, [
+                Comment(
+                    post_id=int(post_ids[posts[index]]),
+                    author_id=int(user_ids[commenters[index]]),
+                    text=self.faker.sentence(),
+                    created=dates[index],
+                )
+                for index in chunk
+            ])
+        self.log(f'Комментарии: {count}')
+        return count
+
+    def update_derived(self, user_ids, post_ids, image_names):
+        for start in range(0, len(user_ids), self.batch_size):
+            batch = user_ids[start:start + self.batch_size].tolist()
+            counters.recount_users(batch)
+            follow_graph.forget(batch)
+        # Список «тяжёлых» авторов мог закэшироваться до появления подписок.
+        cache.delete(timeline.PULL_AUTHORS_KEY)
+        for start in range(0, len(post_ids), self.batch_size):
+            ids = post_ids[start:start + self.batch_size].tolist()
+            counters.recount_comments(ids)
+            posts = list(
+                Post.objects.filter(pk__in=ids).only(
+                    'pk', 'author_id', 'text', 'pub_date'
+                )
+            )
+            index_posts((post.pk, post.text) for post in posts)
+            timeline.fan_out_posts(posts)
+        queue_images(image_names)
+        feed_cache.bump_posts()
+        self.log('Счётчики, поиск и ленты обновлены')
@@ -0,0 +1,71 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, follow_graph, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+# Поля пользователя, которые выводятся в карточках и на страницах постов.
+SHOWN_USER_FIELDS = frozenset({'first_name', 'last_name'})
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if kwargs.get('raw'):
+        return
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+    elif update_fields is None or SHOWN_USER_FIELDS & set(update_fields):
+        # Новый updated счётчиков меняет ETag профиля и постов автора,
+        # сброс лент — их фрагменты; карточки перерисуются по своему ключу.
+        counters.change_user(instance.pk)
+        feed_cache.bump_posts()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        feed_cache.bump_posts()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    feed_cache.bump_posts()
+    if created:
+        counters.change_user(instance.author_id, posts_count=1)
+        timeline.on_post_created(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    feed_cache.bump_posts()
+    counters.change_user(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    feed_cache.bump_user(instance.user_id)
+    follow_graph.forget([instance.user_id])
+    if created:
+        counters.change_user(instance.author_id, followers_count=1)
+        counters.change_user(instance.user_id, following_count=1)
+        timeline.on_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    feed_cache.bump_user(instance.user_id)
+    follow_graph.forget([instance.user_id])
+    counters.change_user(instance.author_id, followers_count=-1)
+    counters.change_user(instance.user_id, following_count=-1)
+    timeline.on_unfollow(instance)
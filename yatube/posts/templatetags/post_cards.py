@@ -0,0 +1,65 @@
+"""Карточки постов в лентах с кэшем на каждую карточку.
+
+Ключ карточки — вариант вёрстки, id поста, его updated и контрольная
+сумма выводимых полей автора и группы. Правка поста, новый комментарий и
+готовая миниатюра меняют updated, переименование автора или группы —
+контрольную сумму, поэтому перерисовывается только затронутая карточка.
+Карточки страницы читаются одним get_many, недостающие рендерятся и
+пишутся одним set_many.
+
+Страница ленты целиком тоже кэшируется (`{% cache %}` с ключом из
+feed_cache) и вкладывает в себя готовые карточки: после сброса поколения
+ленты она собирается из кэша карточек, а не рендерится заново.
+"""
+from zlib import crc32
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from ..thumbnails import prefetched
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+CARD_KEY = 'post_card:{}:{}:{}:{}'
+# Вариант вёрстки → параметры шаблона карточки.
+VARIANTS = {
+    'feed': {'geometry': '860x900', 'show_group': True},
+    'group': {'geometry': '960x339', 'show_group': False},
+}
+
+
+def card_key(variant, post):
+    # Автор и группа загружены вместе с постом (select_related).
+    shown = '\n'.join((
+        post.author.get_full_name(),
+        post.group.slug if post.group_id else '',
+    ))
+    return CARD_KEY.format(
+        variant, post.pk, post.updated.timestamp(), crc32(shown.encode())
+    )
+
+
+@register.simple_tag
+def post_cards(posts, variant='feed'):
+    """HTML карточек постов в порядке постов, из кэша или рендером."""
+    options = VARIANTS[variant]
+    posts = list(posts)
+    keys = [card_key(variant, post) for post in posts]
+    cards = cache.get_many(keys)
+    to_render = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    missing = {}
+    if to_render:
+        card_template = get_template(CARD_TEMPLATE)
+        with prefetched([post for _, post in to_render], options['geometry']):
+            for key, post in to_render:
+                missing[key] = card_template.render({'post': post, **options})
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
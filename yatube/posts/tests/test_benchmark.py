@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+
+from ..benchmark import (
+    EXPECTED_STATUS, UnexpectedStatus, compare, measure, measure_views,
+    view_urls,
+)
+from ..models import Comment, Follow, Group, Post, User
+from ..urls import urlpatterns
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='bench')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(author=reader, text='Пост', group=group)
+        Comment.objects.create(post=post, author=author, text='Коммент')
+
+    def test_every_view_is_measured(self):
+        results = measure_views(repeat=2, warmup=0)
+        self.assertEqual(set(results), {url.name for url in urlpatterns})
+        for name, result in results.items():
+            with self.subTest(name=name):
+                self.assertEqual(
+                    result['status'],
+                    EXPECTED_STATUS.get(name, HTTPStatus.OK),
+                )
+                self.assertGreater(result['queries'], 0)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_unexpected_status_fails(self):
+        with self.assertRaises(UnexpectedStatus):
+            measure(Client(), '/follow/', repeat=1, warmup=0)
+
+    def test_views_without_data_are_skipped(self):
+        names = {name for name, _ in view_urls({})}
+        self.assertEqual(
+            names, {'index', 'trending', 'post_create', 'follow_index'}
+        )
+
+    def test_compare(self):
+        baseline = {'100': {'index': {'p95_ms': 10.0, 'queries': 4}}}
+        same = {'100': {'index': {'p95_ms': 11.0, 'queries': 4}}}
+        slower = {'100': {'index': {'p95_ms': 20.0, 'queries': 5}}}
+        self.assertEqual(compare(same, baseline, 0.2), [])
+        self.assertEqual(len(compare(slower, baseline, 0.2)), 2)
@@ -2,8 +2,10 @@ from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
+from django.utils import timezone
 
-from ..models import Post
+from .. import feed_cache
+from ..models import Follow, Post
 
 User = get_user_model()
 
@@ -39,3 +41,45 @@ class PostModelTest(TestCase):
         Post.objects.filter(text='Текс исходный', author=self.user).last()
         cache.clear()
         self.assertIsNot(response.context.get('page_obj')[0], self.post)
+
+    def test_new_post_invalidates_index(self):
+        """Новый пост сразу виден на закэшированной главной."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_follow_feed_is_per_user(self):
+        """Лента подписок одного читателя не отдаётся другому."""
+        reader = User.objects.create(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        reader_client = Client()
+        reader_client.force_login(reader)
+        response = reader_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, self.post.text)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, self.post.text)
+
+    def test_unfollow_invalidates_follow_feed(self):
+        """Отписка сбрасывает закэшированную ленту читателя."""
+        reader = User.objects.create(username='Reader')
+        follow = Follow.objects.create(user=reader, author=self.user)
+        reader_client = Client()
+        reader_client.force_login(reader)
+        reader_client.get(reverse('posts:follow_index'))
+        follow.delete()
+        response = reader_client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, self.post.text)
+
+    def test_generation_bump_refreshes_page(self):
+        """Страница отдаётся из кэша, пока поколение лент не сдвинуто."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        # update() не шлёт сигналов и поколение не сдвигает; новый updated
+        # меняет только ключ карточки.
+        Post.objects.filter(pk=self.post.pk).update(
+            text='Текст из базы', updated=timezone.now()
+        )
+        self.assertNotContains(self.guest_client.get(url), 'Текст из базы')
+        feed_cache.bump_posts()
+        self.assertContains(self.guest_client.get(url), 'Текст из базы')
@@ -1,7 +1,10 @@
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Comment, Post, User
+from posts.views import NUMBER_COMMENTS
 
 
 class CommentsTest(TestCase):
@@ -57,3 +60,51 @@ class CommentsTest(TestCase):
         ))
         self.assertEqual(Comment.objects.count(), comment_count + 1)
         self.assertEqual(comment.text, form_data['text'])
+
+    def test_comments_paginated_with_fragment(self):
+        """Комментарии отдаются порциями, следующая — фрагментом."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Коммент {i}')
+            for i in range(NUMBER_COMMENTS + 5)
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = self.guest_client.get(url)
+        first = response.context['comments']
+        self.assertEqual(len(first), NUMBER_COMMENTS)
+        self.assertTrue(first.has_next())
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+            {'after': first.paginator.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertFalse(
+            set(first) & set(response.context['comments'])
+        )
+
+    def test_comments_oldest_first(self):
+        """?order=old показывает сначала старые комментарии."""
+        old = Comment.objects.create(
+            post=self.post, author=self.user, text='Первый'
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='Второй')
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            {'order': 'old'},
+        )
+        self.assertEqual(response.context['comments'][0], old)
+
+    def test_detail_queries_do_not_grow(self):
+        """Число запросов страницы поста не зависит от числа комментариев."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        Comment.objects.create(post=self.post, author=self.user, text='Один')
+        with CaptureQueriesContext(connection) as few:
+            self.guest_client.get(url)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=User.objects.create(
+                username=f'commentator{i}'
+            ), text='Ещё') for i in range(10)
+        )
+        with CaptureQueriesContext(connection) as many:
+            self.guest_client.get(url)
+        self.assertEqual(len(few), len(many))
@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Poller')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Текст', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_lists', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+
+    def revalidate(self, client, url, response):
+        return client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_not_modified(self):
+        """Повторный запрос с валидаторами получает 304 без рендеринга.
+
+        Ленты сверяются с отметкой в кэше, профиль и пост — одним запросом.
+        """
+        queries = dict(zip(self.urls, (0, 0, 1, 1)))
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(queries[url]):
+                    again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_invalidates(self):
+        """Правка поста меняет валидаторы всех его страниц."""
+        responses = {url: self.guest_client.get(url) for url in self.urls}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                again = self.revalidate(self.guest_client, url, response)
+                self.assertEqual(again.status_code, HTTPStatus.OK)
+
+    def test_comment_invalidates_detail(self):
+        """Новый комментарий меняет валидаторы страницы поста."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        response = self.guest_client.get(url)
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        again = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+
+    def test_other_user_gets_full_page(self):
+        """ETag гостя не подходит авторизованному пользователю."""
+        url = reverse('posts:index')
+        response = self.guest_client.get(url)
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        again = authorized_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+
+    def test_counters_invalidate_profile_and_detail(self):
+        """Подписчики в профиле и число постов автора на странице поста."""
+        profile = reverse('posts:profile', args=(self.user.username,))
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        responses = {url: self.guest_client.get(url) for url in (
+            profile, detail
+        )}
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=self.user)
+        again = self.revalidate(self.guest_client, profile, responses[profile])
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+        Post.objects.create(author=self.user, text='Ещё')
+        again = self.revalidate(self.guest_client, detail, responses[detail])
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+
+    def test_follow_state_changes_profile_etag(self):
+        """Кнопка подписки в профиле входит в ETag читателя."""
+        reader = User.objects.create_user(username='Reader')
+        client = Client()
+        client.force_login(reader)
+        url = reverse('posts:profile', args=(self.user.username,))
+        response = client.get(url)
+        client.get(reverse('posts:profile_follow', args=(self.user.username,)))
+        again = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, HTTPStatus.OK)
+        self.assertContains(again, 'Отписаться')
+
+    def test_deletion_moves_feed_validators(self):
+        """Удаление поста видно по отметке в общем кэше."""
+        url = reverse('posts:index')
+        extra = Post.objects.create(author=self.user, text='Удалю')
+        response = self.guest_client.get(url)
+        extra.delete()
+        again = self.revalidate(self.guest_client, url, response)
+        self.assertEqual(again.status_code, HTTPStatus.OK)
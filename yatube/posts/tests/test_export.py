@@ -0,0 +1,81 @@
+from io import StringIO
+import csv
+import json
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='export')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=group
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Первый'
+        )
+        Comment.objects.create(
+            post=cls.posts[2], author=cls.reader, text='Третий'
+        )
+        Post.objects.create(author=cls.reader, text='Чужой пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse(
+            'posts:profile_export', kwargs={'username': 'writer'}
+        )
+
+    def test_csv_with_comments(self):
+        """CSV содержит посты автора, за каждым — его комментарии."""
+        response = self.client.get(self.url, {'comments': 1})
+        self.assertTrue(response.streaming)
+        self.assertIn('writer-posts.csv', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(
+            [(row['type'], row['text']) for row in rows],
+            [('post', 'Пост 0'), ('comment', 'Первый'), ('post', 'Пост 1'),
+             ('post', 'Пост 2'), ('comment', 'Третий')],
+        )
+        self.assertEqual(rows[0]['group'], 'export')
+
+    def test_jsonl_without_comments(self):
+        response = self.client.get(self.url, {'format': 'jsonl'})
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.pk for post in self.posts],
+        )
+
+    def test_only_author_can_export(self):
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(self.url)
+        self.assertRedirects(
+            response, reverse('posts:profile', kwargs={'username': 'writer'})
+        )
+
+    def test_command_jsonl(self):
+        """Команда пишет комментарии следом за их постами."""
+        out = StringIO()
+        call_command(
+            'export_posts', 'writer', format='jsonl', comments=True,
+            chunk_size=1, stdout=out,
+        )
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[1]['post'], self.posts[0].pk)
@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Comment, Follow, Group, Post, User
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
 
 User = get_user_model()
 
@@ -76,3 +78,58 @@ class FollowTest(TestCase):
         self.assertEqual(Follow.objects.count(), follow_count - 1)
         self.assertNotEqual(follow.user, self.user_1)
         self.assertNotIn(first, Follow.objects.all())
+
+    def test_timeline_fan_out(self):
+        """Пост раскладывается по лентам подписчиков, отписка их чистит."""
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user_2, post=self.post
+        ).exists())
+        post = Post.objects.create(author=self.user_1, text='Ещё пост')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user_2, post=post
+        ).exists())
+        Follow.objects.filter(user=self.user_2, author=self.user_1).delete()
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user_2
+        ).exists())
+
+    @override_settings(TIMELINE_PULL_FOLLOWERS=1)
+    def test_pull_author_posts_in_feed(self):
+        """Посты популярного автора подмешиваются в ленту при чтении."""
+        Follow.objects.create(user=self.user_1, author=self.user_2)
+        cache.clear()
+        post = Post.objects.create(author=self.user_2, text='Без fan-out')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+        cache.clear()
+
+    @override_settings(TIMELINE_PULL_FOLLOWERS=2)
+    def test_author_leaving_pull_is_backfilled(self):
+        """Посты, вышедшие во время pull, попадают в ленты после него."""
+        third = User.objects.create_user(username='User3')
+        Follow.objects.create(user=self.user_1, author=self.user_2)
+        Follow.objects.create(user=third, author=self.user_2)
+        cache.clear()
+        self.assertIn(self.user_2.pk, timeline.pull_authors())
+        post = Post.objects.create(author=self.user_2, text='Во время pull')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+        Follow.objects.filter(user=third, author=self.user_2).delete()
+        cache.delete(timeline.PULL_AUTHORS_KEY)
+        self.assertNotIn(self.user_2.pk, timeline.pull_authors())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.user_1, post=post
+        ).exists())
+        cache.clear()
+
+    def test_late_jobs_skip_removed_follow(self):
+        """Задачи, дошедшие до воркера после отписки, ленту не заполняют."""
+        reader = User.objects.create_user(username='Late')
+        Follow.objects.create(user=reader, author=self.user_1)
+        post = Post.objects.create(author=self.user_1, text='После отписки')
+        Follow.objects.filter(user=reader, author=self.user_1).delete()
+        timeline.prune(reader.pk, self.user_1.pk)
+        timeline.backfill(reader.pk, self.user_1.pk)
+        timeline.fan_out_post(post.pk)
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
@@ -0,0 +1,107 @@
+from array import array
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow, User
+
+
+class FollowGraphTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[2])
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query['sql'] for query in queries
+            if '"posts_follow"' in query['sql']
+        ]
+
+    def test_following_is_sorted_array(self):
+        self.assertEqual(
+            list(follow_graph.following(self.reader.pk)),
+            sorted([self.authors[0].pk, self.authors[2].pk]),
+        )
+        self.assertEqual(
+            follow_graph.followed_among(
+                self.reader.pk, [author.pk for author in self.authors]
+            ),
+            [self.authors[0].pk, self.authors[2].pk],
+        )
+
+    def test_profile_button_without_follow_query(self):
+        url = reverse('posts:profile', args=(self.authors[0].username,))
+        self.client.get(url)
+        response, queries = self.follow_queries(url)
+        self.assertEqual(queries, [])
+        self.assertTrue(response.context['following'])
+
+    def test_follow_and_unfollow_reset_cache(self):
+        follow_graph.following(self.reader.pk)
+        author = self.authors[1]
+        key = follow_graph.FOLLOWING_KEY.format(self.reader.pk)
+        self.client.get(
+            reverse('posts:profile_follow', args=(author.username,))
+        )
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(
+            list(follow_graph.following(self.reader.pk)),
+            sorted(author.pk for author in self.authors),
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(author.username,))
+        )
+        self.assertFalse(follow_graph.is_following(self.reader.pk, author.pk))
+        self.assertFalse(
+            Follow.objects.filter(user=self.reader, author=author).exists()
+        )
+
+    def test_stale_graph_does_not_skip_writes(self):
+        """Подписка пишется, даже если закэшированный массив устарел."""
+        author = self.authors[1]
+        cache.set(
+            follow_graph.FOLLOWING_KEY.format(self.reader.pk),
+            array('q', [author.pk]),
+        )
+        self.client.get(
+            reverse('posts:profile_follow', args=(author.username,))
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.reader, author=author).exists()
+        )
+        cache.set(
+            follow_graph.FOLLOWING_KEY.format(self.reader.pk), array('q')
+        )
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(author.username,))
+        )
+        self.assertFalse(
+            Follow.objects.filter(user=self.reader, author=author).exists()
+        )
+
+    def test_forget_reloads_from_database(self):
+        follow_graph.following(self.reader.pk)
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.authors[1])]
+        )
+        follow_graph.forget([self.reader.pk])
+        self.assertTrue(
+            follow_graph.is_following(self.reader.pk, self.authors[1].pk)
+        )
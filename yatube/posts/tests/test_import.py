@@ -0,0 +1,126 @@
+from io import StringIO
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from search.index import search
+
+from ..models import (
+    AuthorStats, Comment, Follow, ImportedPost, Post, TimelineEntry, User,
+)
+
+RECORDS = [
+    {'type': 'follow', 'user': 'reader', 'author': 'writer'},
+    {
+        'type': 'post', 'id': 100, 'author': 'writer', 'group': 'imported',
+        'text': 'Импортированный пост', 'pub_date': '2020-01-02T03:04:05Z',
+    },
+    {'type': 'post', 'author': 'writer', 'text': 'Второй пост'},
+    {'type': 'comment', 'post': 100, 'author': 'reader', 'text': 'Ого'},
+]
+
+
+class ImportContentTest(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            for record in RECORDS:
+                stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.addCleanup(os.remove, self.path)
+
+    def test_import_with_derived_data(self):
+        """Импорт создаёт записи и обновляет производные данные."""
+        call_command(
+            'import_content', self.path, batch_size=3, stdout=StringIO()
+        )
+        post = ImportedPost.objects.get(source_id='100').post
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.group.slug, 'imported')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        writer = User.objects.get(username='writer')
+        self.assertEqual(AuthorStats.objects.get(user=writer).posts_count, 2)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 2
+        )
+        self.assertIn(post, search('импортированный'))
+
+    def test_resume_skips_imported_records(self):
+        """Повторный запуск продолжает с сохранённой позиции."""
+        call_command('import_content', self.path, stdout=StringIO())
+        call_command('import_content', self.path, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_csv(self):
+        """CSV читается по одноимённым колонкам, пустые ячейки пропускаются.
+        """
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write('type,author,text,group\n')
+            stream.write('post,writer,Пост из таблицы,\n')
+        self.addCleanup(os.remove, path)
+        call_command('import_content', path, stdout=StringIO())
+        post = Post.objects.get()
+        self.assertEqual(post.text, 'Пост из таблицы')
+        self.assertIsNone(post.group)
+
+    def test_source_ids_do_not_collide_with_local_posts(self):
+        """Id источника, занятый локальным постом, получает новый пост."""
+        local = Post.objects.create(
+            pk=100,
+            author=User.objects.create_user(username='local'),
+            text='Локальный пост',
+        )
+        call_command(
+            'import_content', self.path, batch_size=3, stdout=StringIO()
+        )
+        post = ImportedPost.objects.get(source_id='100').post
+        self.assertNotEqual(post.pk, local.pk)
+        self.assertEqual(post.text, 'Импортированный пост')
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertFalse(local.comments.exists())
+
+    def test_bad_record(self):
+        """Ошибочная запись останавливает импорт с номером строки."""
+        with open(self.path, encoding='utf-8') as stream:
+            good = stream.read()
+        for record in ('{"type": "like"}', '{"type": "comment"}', '{'):
+            with self.subTest(record=record):
+                # Пустая строка не запись, но в номере строки учтена.
+                with open(self.path, 'w', encoding='utf-8') as stream:
+                    stream.write(good + '\n' + record + '\n')
+                with self.assertRaisesMessage(CommandError, 'Строка 6'):
+                    call_command(
+                        'import_content', self.path, source=record,
+                        stdout=StringIO(),
+                    )
+
+    def test_follows_backfilled_in_bulk(self):
+        """Ленты новых подписок пачки заполняются одной вставкой."""
+        with open(self.path, 'a', encoding='utf-8') as stream:
+            for number in range(3):
+                stream.write(json.dumps({
+                    'type': 'follow', 'user': f'fan{number}',
+                    'author': 'writer',
+                }) + '\n')
+        with mock.patch.object(
+            TimelineEntry.objects, 'bulk_create',
+            wraps=TimelineEntry.objects.bulk_create,
+        ) as bulk_create:
+            call_command('import_content', self.path, stdout=StringIO())
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username__startswith='fan')
+            .count(),
+            6,
+        )
+        # Раскладка новых постов и дозаполнение новых подписок.
+        self.assertEqual(bulk_create.call_count, 2)
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+from ..models import User
+
+CALLS = []
+
+
+def record(value, suffix=''):
+    CALLS.append(f'{value}{suffix}')
+
+
+def explode():
+    raise ValueError('boom')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_higher_priority_runs_first(self):
+        jobs.enqueue(record, 'low')
+        jobs.enqueue(record, 'high', priority=5)
+        jobs.enqueue(record, 'mid', suffix='!', priority=1)
+        self.assertEqual(jobs.Worker().work(burst=True), 3)
+        self.assertEqual(CALLS, ['high', 'mid!', 'low'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_scheduled_job_waits_for_its_time(self):
+        jobs.enqueue(record, 'later', delay=60)
+        self.assertEqual(jobs.Worker().work(burst=True), 0)
+        Job.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.Worker().work(burst=True), 1)
+        self.assertEqual(CALLS, ['later'])
+
+    def test_worker_takes_only_its_queues(self):
+        jobs.enqueue(record, 'mail', queue='mail')
+        jobs.enqueue(record, 'other', queue='other')
+        jobs.Worker(queues=['mail']).work(burst=True)
+        self.assertEqual(CALLS, ['mail'])
+        self.assertEqual(Job.objects.get().queue, 'other')
+
+    def test_waiting_duplicate_is_skipped(self):
+        jobs.enqueue(record, 'a', dedup_key='same')
+        jobs.enqueue(record, 'b', dedup_key='same')
+        self.assertEqual(Job.objects.count(), 1)
+        jobs.Worker().work(burst=True)
+        self.assertEqual(CALLS, ['a'])
+        jobs.enqueue(record, 'c', dedup_key='same')
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claimed_job_is_not_taken_again(self):
+        jobs.enqueue(record, 'once')
+        self.assertEqual(len(jobs.Worker(name='first').claim()), 1)
+        self.assertEqual(jobs.Worker(name='second').claim(), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        jobs.enqueue(explode, max_attempts=2)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            jobs.Worker().work(burst=True)
+        task = Job.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertIsNone(task.failed_at)
+        self.assertIn('ValueError: boom', task.last_error)
+        self.assertGreater(task.run_at, timezone.now())
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.Worker().work(burst=True)
+        task = Job.objects.get()
+        self.assertEqual(task.attempts, 2)
+        self.assertIsNotNone(task.failed_at)
+        self.assertEqual(jobs.Worker().work(burst=True), 0)
+
+    def test_backoff_grows_up_to_limit(self):
+        with override_settings(JOBS_RETRY_BASE=10, JOBS_RETRY_MAX=60):
+            self.assertTrue(10 <= jobs.backoff(1) <= 12)
+            self.assertTrue(20 <= jobs.backoff(2) <= 24)
+            self.assertTrue(60 <= jobs.backoff(10) <= 72)
+
+    def test_run_workers_burst(self):
+        jobs.enqueue(record, 'a')
+        jobs.enqueue(record, 'b', queue='mail')
+        out = StringIO()
+        call_command(
+            'run_workers', workers=0, burst=True, queues=['mail'], stdout=out
+        )
+        self.assertEqual(CALLS, ['b'])
+        self.assertEqual(Job.objects.get().queue, jobs.DEFAULT_QUEUE)
+
+
+class EagerJobTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_default_queue_runs_at_once(self):
+        jobs.enqueue(record, 'now')
+        jobs.enqueue(record, 'queued', queue='mail')
+        jobs.enqueue(record, 'later', delay=60)
+        self.assertEqual(CALLS, ['now'])
+        self.assertEqual(Job.objects.count(), 2)
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class PasswordResetQueueTest(TestCase):
+    def test_reset_email_is_sent_by_worker(self):
+        User.objects.create_user(
+            'reader', email='reader@example.com', password='secret-pass'
+        )
+        Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'reader@example.com'},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().priority, 10)
+        jobs.Worker().work(burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
@@ -0,0 +1,119 @@
+from io import StringIO
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import ARCHIVE, MmapedDict, collect, inc, metric_key
+
+from ..models import Post, User
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings = override_settings(METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_processes_are_summed(self):
+        """Файлы разных процессов складываются при чтении."""
+        key = metric_key('yatube_requests_total', view='posts:index')
+        for pid, amount in ((1, 2), (2, 3)):
+            values = MmapedDict(os.path.join(self.directory, f'{pid}.db'))
+            values.inc(key, amount)
+            values.close()
+        inc('yatube_requests_total', view='posts:index')
+        self.assertEqual(collect()[key], 6)
+
+    def test_file_grows_and_reopens(self):
+        path = os.path.join(self.directory, 'big.db')
+        values = MmapedDict(path)
+        for number in range(3000):
+            values.inc(metric_key('m', number=number), number)
+        values.close()
+        values = MmapedDict(path)
+        values.inc(metric_key('m', number=2999))
+        values.close()
+        self.assertEqual(collect()[metric_key('m', number=2999)], 3000)
+        self.assertEqual(len(collect()), 3000)
+
+    def test_dead_processes_are_archived(self):
+        """Файлы завершившихся процессов сливаются в архив."""
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        key = metric_key('yatube_requests_total', view='posts:index')
+        for _ in range(2):
+            values = MmapedDict(
+                os.path.join(self.directory, f'{process.pid}.db')
+            )
+            values.inc(key, 2)
+            values.close()
+            self.assertEqual(collect()[key], 2 * (_ + 1))
+        files = sorted(
+            name for name in os.listdir(self.directory)
+            if name.endswith('.db')
+        )
+        self.assertEqual(files, [ARCHIVE])
+
+    def test_clear_metrics(self):
+        inc('yatube_requests_total', view='posts:index')
+        call_command('clear_metrics', stdout=StringIO())
+        self.assertEqual(collect(), {})
+        inc('yatube_requests_total', view='posts:index')
+        self.assertEqual(len(collect()), 1)
+
+    @override_settings(METRICS_PROFILE_SAMPLE_RATE=1.0)
+    def test_endpoint(self):
+        Post.objects.create(
+            author=User.objects.create_user(username='author'), text='Пост'
+        )
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get('/no-such-page/')
+        body = client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', body)
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 1', body
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="+Inf",status="200",'
+            'view="posts:index"} 1', body
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{status="404",'
+            'view="<unresolved>"} 1', body
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', body)
+        self.assertIn('result="miss"', body)
+
+    @override_settings(
+        METRICS_PROFILE_SAMPLE_RATE=0.0, PROFILING_SERVER_TIMING=False
+    )
+    def test_no_profile_without_sampling(self):
+        with mock.patch('core.profiling.RequestProfile') as profile:
+            Client().get(reverse('posts:index'))
+        profile.assert_not_called()
+        body = Client().get(reverse('metrics')).content.decode()
+        self.assertIn('view="posts:index"', body)
+        self.assertNotIn('yatube_db_queries_total{', body)
+
+    @override_settings(METRICS_ALLOWED_IPS=[])
+    def test_endpoint_is_internal(self):
+        self.assertEqual(Client().get(reverse('metrics')).status_code, 404)
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_proxied_request_is_external(self):
+        """За локальным прокси REMOTE_ADDR — 127.0.0.1 у всех."""
+        response = Client().get(
+            reverse('metrics'), HTTP_X_FORWARDED_FOR='203.0.113.5'
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import feed_cache
+from ..models import Comment, Group, Post, User
+from ..templatetags import post_cards
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='cards')
+        cls.first = Post.objects.create(
+            author=cls.author, text='Первый пост', group=cls.group
+        )
+        cls.second = Post.objects.create(
+            author=cls.author, text='Второй пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def card(self, post, variant='feed'):
+        post.refresh_from_db()
+        return cache.get(post_cards.card_key(variant, post))
+
+    def rendered_cards(self, url):
+        """Запрашивает страницу и возвращает число отрендеренных карточек."""
+        template = post_cards.get_template(post_cards.CARD_TEMPLATE)
+        with mock.patch.object(
+            post_cards, 'get_template', return_value=template
+        ), mock.patch.object(
+            template, 'render', wraps=template.render
+        ) as render:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return render.call_count
+
+    def test_feed_pages_cache_cards(self):
+        pages = (
+            (reverse('posts:index'), 'feed'),
+            (reverse('posts:group_lists', args=(self.group.slug,)), 'group'),
+            (reverse('posts:profile', args=(self.author.username,)), 'feed'),
+        )
+        for url, variant in pages:
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.assertIn('Первый пост', self.card(self.first, variant))
+                self.assertIn('Второй пост', self.card(self.second, variant))
+
+    def test_page_is_rebuilt_from_cached_cards(self):
+        """После сброса фрагмента ленты карточки не рендерятся заново."""
+        url = reverse('posts:index')
+        self.assertEqual(self.rendered_cards(url), 2)
+        feed_cache.bump_posts()
+        self.assertEqual(self.rendered_cards(url), 0)
+
+    def test_edit_rerenders_only_its_card(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.first.text = 'Исправленный пост'
+        self.first.save()
+        self.assertEqual(self.rendered_cards(url), 1)
+        self.assertIn('Исправленный пост', self.card(self.first))
+
+    def test_comment_rerenders_only_its_card(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        Comment.objects.create(
+            post=self.second, author=self.author, text='Коммент'
+        )
+        feed_cache.bump_posts()
+        self.assertEqual(self.rendered_cards(url), 1)
+        self.assertIsNotNone(self.card(self.first))
+
+    def test_author_rename_rerenders_cards(self):
+        """Новое имя автора попадает в карточки и ленты без правки постов."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Лев'
+        author.last_name = 'Толстой'
+        author.save()
+        self.assertEqual(self.rendered_cards(url), 2)
+        self.assertContains(self.client.get(url), 'Лев Толстой')
+
+    def test_group_slug_change_rerenders_cards(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        response = self.client.get(url)
+        self.assertContains(
+            response, reverse('posts:group_lists', args=('renamed',))
+        )
+        self.assertIn('renamed', self.card(self.first))
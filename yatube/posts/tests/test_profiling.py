@@ -0,0 +1,68 @@
+import json
+import shutil
+import tempfile
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from core.profiling import ProfiledCache
+
+from ..models import Post, User
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        Post.objects.create(author=author, text='Пост')
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        response = Client().get(reverse('posts:index'))
+        metrics = dict(
+            metric.strip().split(';', 1)
+            for metric in response['Server-Timing'].split(',')
+        )
+        for name in ('db', 'tpl', 'cache', 'cache-miss', 'total'):
+            with self.subTest(name=name):
+                self.assertIn(name, metrics)
+        self.assertIn('queries', metrics['db'])
+
+    @override_settings(
+        PROFILING_SERVER_TIMING=False, PROFILING_LOG_SAMPLE_RATE=1.0
+    )
+    def test_sampled_log_line(self):
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            response = Client().get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('posts:index'))
+        self.assertGreater(record['db_count'], 0)
+        self.assertIn('template_ms', record)
+
+    @override_settings(
+        PROFILING_SERVER_TIMING=False, PROFILING_LOG_SAMPLE_RATE=0.0
+    )
+    def test_disabled(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class ProfiledCacheTest(TestCase):
+    def test_wraps_any_backend(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cache = ProfiledCache(directory, {'OPTIONS': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        }})
+        self.assertIsInstance(cache.backend, FileBasedCache)
+        with profiling.profiled() as profile:
+            cache.set('a', 1)
+            self.assertEqual(cache.get_many(['a', 'b']), {'a': 1})
+            self.assertIsNone(cache.get('b'))
+            self.assertIn('a', cache)
+        self.assertEqual(profile.counts['cache_hit'], 1)
+        self.assertEqual(profile.counts['cache_miss'], 2)
+        self.assertEqual(profile.counts['cache'], 4)
@@ -0,0 +1,154 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import (
+    QueryBudgetExceeded, QueryBudgetMiddleware, QueryBudgetTestMixin,
+    query_budget,
+)
+
+from ..models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    """Число запросов каждой страницы не зависит от объёма данных."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='budget')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.reader, text='Свой пост', group=cls.group
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def add_data(self, count):
+        """Посты разных авторов, группы, картинки и комментарии."""
+        first = User.objects.count()
+        for number in range(first, first + count):
+            author = User.objects.create_user(username=f'writer{number}')
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(
+                author=author, text=f'Пост {number}',
+                group=Group.objects.create(
+                    title=f'Группа {number}', slug=f'group-{number}'
+                ),
+            )
+            Post.objects.create(
+                author=self.author, text=f'Ещё {number}', group=self.group,
+                image=SimpleUploadedFile(
+                    f'budget{number}.gif', SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            )
+            Comment.objects.create(
+                post=self.post, author=author, text=f'Коммент {number}'
+            )
+
+    def page_urls(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_lists', kwargs={'slug': 'budget'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_comments', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            reverse('posts:post_create'),
+            reverse('posts:follow_index'),
+        ]
+
+    def measure_pages(self):
+        counts = {}
+        for url in self.page_urls():
+            # Холодный кэш фрагментов — худший случай для шаблонов.
+            cache.clear()
+            with self.subTest(url=url):
+                counts[url] = self.assertWithinBudget(self.client, url)
+        return counts
+
+    def test_pages_constant_queries(self):
+        self.add_data(2)
+        small = self.measure_pages()
+        self.add_data(12)
+        self.assertEqual(self.measure_pages(), small)
+
+    def test_writes_within_budget(self):
+        self.add_data(3)
+        self.assertWithinBudget(
+            self.client, reverse('posts:post_create'),
+            {'text': 'Новый пост', 'group': self.group.pk},
+        )
+        self.assertWithinBudget(
+            self.client,
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        self.assertWithinBudget(
+            self.client,
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Изменённый пост'},
+        )
+        profile = {'username': 'writer3'}
+        self.assertWithinBudget(
+            self.client, reverse('posts:profile_unfollow', kwargs=profile)
+        )
+        self.assertWithinBudget(
+            self.client, reverse('posts:profile_follow', kwargs=profile)
+        )
+        self.assertWithinBudget(
+            self.client, reverse('posts:profile_export', kwargs=profile)
+        )
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        @query_budget(1)
+        def view(request):
+            list(User.objects.all())
+            list(Group.objects.all())
+            return HttpResponse()
+
+        self.view = view
+        self.request = RequestFactory().get('/')
+        self.middleware = QueryBudgetMiddleware(self.respond)
+
+    def respond(self, request):
+        self.middleware.process_view(request, self.view, (), {})
+        return self.view(request)
+
+    def test_logs_over_budget(self):
+        with self.assertLogs('core.query_budget', 'WARNING') as logs:
+            self.middleware(self.request)
+        self.assertIn('2 SQL-запросов при бюджете 1', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_raises_when_configured(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.middleware(self.request)
@@ -0,0 +1,36 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, User
+from ..query_plans import check_views, full_scans
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='plans')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        post = Post.objects.create(author=cls.reader, text='Пост', group=group)
+        Comment.objects.create(post=post, author=cls.author, text='Коммент')
+
+    def test_full_scans(self):
+        self.assertEqual(full_scans(['SCAN posts_post']), ['posts_post'])
+        self.assertEqual(full_scans(['SCAN TABLE posts_post']), ['posts_post'])
+        self.assertEqual(
+            full_scans(['SCAN posts_post USING INDEX post_author_date']), []
+        )
+        self.assertEqual(full_scans(['SCAN posts_group']), [])
+        self.assertEqual(full_scans(['SEARCH posts_post USING INDEX x']), [])
+
+    def test_pages_use_indexes(self):
+        for name, queries in check_views().items():
+            with self.subTest(name=name):
+                self.assertTrue(queries)
+                for sql, plan, scans in queries:
+                    self.assertEqual(scans, [], sql)
+
+    def test_follow_is_unique(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+
+from ..models import Comment, Post, User
+
+LIMITS = {
+    'posts:add_comment': {
+        'methods': ('POST',), 'user': (2, 60), 'ip': (3, 60),
+    },
+}
+
+
+class CounterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.counter = (('view', 'user', 1), 2, 10)
+
+    def test_window_limits_and_resets(self):
+        self.assertEqual(ratelimit.take(self.counter, 100), 0)
+        self.assertEqual(ratelimit.take(self.counter, 101), 0)
+        self.assertAlmostEqual(ratelimit.take(self.counter, 104), 6)
+        self.assertEqual(ratelimit.take(self.counter, 110), 0)
+
+    def test_one_cache_call_per_request(self):
+        """После первого запроса окна — один incr и ничего больше."""
+        ratelimit.take(self.counter, 100)
+        with mock.patch.object(
+            ratelimit, 'cache', wraps=ratelimit.cache
+        ) as spy:
+            ratelimit.take(self.counter, 101)
+            ratelimit.take(self.counter, 102)
+        self.assertEqual(
+            [call[0] for call in spy.method_calls], ['incr', 'incr']
+        )
+
+
+@override_settings(RATE_LIMITS=LIMITS)
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.bot = User.objects.create_user(username='bot')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:add_comment', args=(self.post.pk,))
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_user_limit_returns_429(self):
+        client = self.client_for(self.bot)
+        with mock.patch.object(ratelimit.time, 'time', return_value=30):
+            for _ in range(2):
+                response = client.post(self.url, {'text': 'спам'})
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
+            response = client.post(self.url, {'text': 'спам'})
+            self.assertEqual(
+                response.status_code, HTTPStatus.TOO_MANY_REQUESTS
+            )
+            self.assertEqual(response['Retry-After'], '30')
+            self.assertEqual(Comment.objects.count(), 2)
+            # GET не ограничивается, у другого пользователя свой счётчик.
+            self.assertEqual(
+                client.get(self.url).status_code, HTTPStatus.FOUND
+            )
+            author = self.client_for(self.author)
+            self.assertEqual(
+                author.post(self.url, {'text': 'ок'}).status_code,
+                HTTPStatus.FOUND,
+            )
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_ip_bucket_behind_proxy(self):
+        """За прокси у анонимов разные счётчики, адрес берёт прокси."""
+        with mock.patch.object(ratelimit.time, 'time', return_value=30):
+            for number, forged in enumerate(('1.1.1.1', '9.9.9.9, 1.1.1.1')):
+                statuses = [
+                    Client().post(
+                        self.url, {'text': 'текст'},
+                        HTTP_X_FORWARDED_FOR=f'{forged}, 10.0.0.{number}',
+                    ).status_code
+                    for _ in range(4)
+                ]
+                self.assertEqual(
+                    statuses,
+                    [HTTPStatus.FOUND] * 3 + [HTTPStatus.TOO_MANY_REQUESTS],
+                )
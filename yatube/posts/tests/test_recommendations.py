@@ -0,0 +1,115 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+import numpy as np
+
+from ..models import Follow, FollowSuggestion, Group, Post, User
+from ..recommendations import (
+    cap_rows, csr, expand, recommend, suggestions_for, top_per_row,
+)
+
+
+class SparseHelpersTest(TestCase):
+    def test_csr_expand_and_cap(self):
+        indptr, cols = csr(
+            np.array([2, 0, 2, 2]), np.array([5, 4, 1, 3]), 3
+        )
+        self.assertEqual(indptr.tolist(), [0, 1, 1, 4])
+        self.assertEqual(cols.tolist(), [4, 1, 3, 5])
+        owners, positions = expand(indptr, np.array([2, 0]))
+        self.assertEqual(owners.tolist(), [0, 0, 0, 1])
+        self.assertEqual(cols[positions].tolist(), [1, 3, 5, 4])
+        capped, capped_cols = cap_rows(indptr, cols, 2)
+        self.assertEqual(capped.tolist(), [0, 1, 1, 3])
+        self.assertEqual(capped_cols.tolist(), [4, 1, 3])
+
+    def test_top_per_row(self):
+        rows, cols, scores = top_per_row(
+            np.array([1, 0, 1, 1]), np.array([7, 8, 9, 6]),
+            np.array([0.5, 0.1, 0.9, 0.5]), 2,
+        )
+        self.assertEqual(rows.tolist(), [0, 1, 1])
+        self.assertEqual(cols.tolist(), [8, 9, 6])
+
+
+class RecommendationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(title='Группа', slug='recs')
+        users = {
+            name: User.objects.create_user(username=name)
+            for name in ('first', 'second', 'third', 'newbie', 'a', 'b', 'c')
+        }
+        cls.users = users
+        for author in ('a', 'b', 'c'):
+            Post.objects.create(
+                author=users[author], text='Пост', group=cls.group
+            )
+        Post.objects.create(
+            author=users['newbie'], text='Первый пост', group=cls.group
+        )
+        for user, author in (
+            ('first', 'a'), ('first', 'b'), ('second', 'a'), ('second', 'b'),
+            ('second', 'c'), ('third', 'a'),
+        ):
+            Follow.objects.create(user=users[user], author=users[author])
+
+    def setUp(self):
+        cache.clear()
+
+    def suggested(self, name):
+        return list(
+            FollowSuggestion.objects.filter(user=self.users[name])
+            .order_by('-score').values_list('author__username', flat=True)
+        )
+
+    def test_cofollowed_authors_are_suggested(self):
+        call_command('recommend_follows', stdout=StringIO())
+        self.assertEqual(self.suggested('third')[:2], ['b', 'c'])
+        self.assertEqual(self.suggested('first')[0], 'c')
+        for name, user in self.users.items():
+            with self.subTest(name=name):
+                followed = set(Follow.objects.filter(user=user).values_list(
+                    'author__username', flat=True
+                ))
+                suggested = set(self.suggested(name))
+                self.assertFalse(suggested & followed)
+                self.assertNotIn(name, suggested)
+
+    def test_group_fallback_without_follows(self):
+        recommend()
+        self.assertEqual(set(self.suggested('newbie')), {'a', 'b', 'c'})
+
+    def test_result_does_not_depend_on_batches(self):
+        recommend(max_pairs=1)
+        small = sorted(FollowSuggestion.objects.values_list(
+            'user', 'author', 'score'
+        ))
+        recommend()
+        self.assertEqual(small, sorted(FollowSuggestion.objects.values_list(
+            'user', 'author', 'score'
+        )))
+
+    def test_pages_show_suggestions_without_followed(self):
+        recommend()
+        client = Client()
+        client.force_login(self.users['third'])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [author.username for author in response.context['suggestions']],
+            ['b', 'c', 'newbie'],
+        )
+        Follow.objects.create(user=self.users['third'], author=self.users['b'])
+        self.assertEqual(
+            [author.username for author in suggestions_for(
+                self.users['third'].pk
+            )][:1],
+            ['c'],
+        )
+        response = client.get(
+            reverse('posts:profile', args=(self.users['a'].username,))
+        )
+        self.assertContains(response, 'На кого подписаться')
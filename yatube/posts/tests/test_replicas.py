@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.db_router import STICKY_COOKIE
+
+from ..models import Post, User
+
+REPLICA = 'replica_test'
+
+
+def always_lagging(alias):
+    return float('inf')
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Реплика — второй файл SQLite, «репликация» — копия основной базы."""
+
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.replica_path,
+        }
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        if hasattr(connections._connections, REPLICA):
+            delattr(connections._connections, REPLICA)
+        os.remove(cls.replica_path)
+
+    def replicate(self):
+        primary = connections['default']
+        primary.ensure_connection()
+        connections[REPLICA].close()
+        target = sqlite3.connect(self.replica_path)
+        primary.connection.backup(target)
+        target.close()
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Старый')
+        self.replicate()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def index_texts(self, client):
+        response = client.get(reverse('posts:index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_feed_reads_replica(self):
+        Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.index_texts(Client()), ['Старый'])
+        self.replicate()
+        self.assertEqual(self.index_texts(Client()), ['Новый', 'Старый'])
+
+    def test_reads_stick_to_primary_after_write(self):
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Свой комментарий'},
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, 'Свой комментарий')
+        self.client.cookies.pop(STICKY_COOKIE)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertNotContains(response, 'Свой комментарий')
+
+    def test_unmarked_views_read_primary(self):
+        post = Post.objects.create(author=self.author, text='Черновик')
+        response = self.client.get(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(REPLICA_LAG_PROBE=f'{__name__}.always_lagging')
+    def test_lagging_replica_is_skipped(self):
+        Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.index_texts(Client()), ['Новый', 'Старый'])
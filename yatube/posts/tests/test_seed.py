@@ -0,0 +1,79 @@
+from io import StringIO
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from ..models import (
+    AuthorStats, Comment, Follow, Group, Post, TimelineEntry, User,
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SEED_OPTIONS = {
+    'users': 60, 'groups': 4, 'posts': 300, 'comments': 400,
+    'follows': 500, 'images': 2, 'batch_size': 70,
+}
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, seed=7):
+        call_command('seed', seed=seed, stdout=StringIO(), **SEED_OPTIONS)
+
+    def snapshot(self):
+        return (
+            list(User.objects.order_by('pk').values_list('pk', 'username')),
+            list(Post.objects.order_by('pk').values_list(
+                'author_id', 'group_id', 'text', 'image', 'pub_date'
+            )),
+            list(Follow.objects.order_by('user', 'author').values_list(
+                'user', 'author'
+            )),
+            list(Comment.objects.order_by('pk').values_list(
+                'post_id', 'author_id', 'created'
+            )),
+        )
+
+    def test_counts_and_derived_data(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), SEED_OPTIONS['users'])
+        self.assertEqual(Post.objects.count(), SEED_OPTIONS['posts'])
+        self.assertEqual(Comment.objects.count(), SEED_OPTIONS['comments'])
+        self.assertFalse(
+            Follow.objects.filter(user=F('author')).exists()
+        )
+        self.assertEqual(
+            AuthorStats.objects.count(), SEED_OPTIONS['users']
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    def test_posting_is_heavy_tailed(self):
+        """Десятая часть авторов пишет заметно больше десятой части постов."""
+        self.seed()
+        counts = sorted(
+            AuthorStats.objects.values_list('posts_count', flat=True),
+            reverse=True,
+        )
+        top = sum(counts[:len(counts) // 10])
+        self.assertGreater(top, SEED_OPTIONS['posts'] * 0.3)
+
+    def test_same_seed_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        for model in (Comment, Follow, Post, User, Group):
+            model.objects.all().delete()
+        self.seed()
+        self.assertEqual(self.snapshot(), first)
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        self.seed(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
@@ -0,0 +1,118 @@
+import gzip
+from io import StringIO
+import json
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import staticfiles
+
+CSS = (
+    'body { background: url("../img/dot.png"); }\n'
+    + '.post { margin: 0 auto; padding: 1rem; }\n' * 50
+).encode()
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 200
+
+
+class AcceptEncodingTest(TestCase):
+    def test_rejected_codings_are_dropped(self):
+        self.assertEqual(
+            staticfiles.accepted_encodings('gzip, deflate, br;q=0'),
+            {'gzip', 'deflate'},
+        )
+        self.assertEqual(
+            staticfiles.accepted_encodings('BR;q=0.5, gzip;q=0.0'), {'br'}
+        )
+        self.assertEqual(staticfiles.accepted_encodings(''), set())
+
+
+class CollectStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        for name, content in (('css/site.css', CSS), ('img/dot.png', PNG)):
+            path = os.path.join(cls.source, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as file:
+                file.write(content)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root, DEBUG=False,
+        )
+        cls.settings.enable()
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, url, accept_encoding=''):
+        middleware = staticfiles.StaticFilesMiddleware(
+            lambda request: HttpResponse('view')
+        )
+        request = RequestFactory().get(
+            url, HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return middleware(request)
+
+    def hashed(self, name):
+        with open(os.path.join(self.root, 'staticfiles.json')) as manifest:
+            return json.load(manifest)['paths'][name]
+
+    def test_manifest_names_are_used_in_urls(self):
+        css = self.hashed('css/site.css')
+        self.assertNotEqual(css, 'css/site.css')
+        self.assertEqual(
+            staticfiles_storage.url('css/site.css'), settings.STATIC_URL + css
+        )
+        with open(os.path.join(self.root, css), 'rb') as file:
+            self.assertIn(self.hashed('img/dot.png').encode(), file.read())
+
+    def test_text_files_are_precompressed(self):
+        css = os.path.join(self.root, self.hashed('css/site.css'))
+        with gzip.open(css + '.gz') as compressed, open(css, 'rb') as file:
+            self.assertEqual(compressed.read(), file.read())
+        png = os.path.join(self.root, self.hashed('img/dot.png'))
+        self.assertFalse(os.path.exists(png + '.gz'))
+
+    def test_gzip_variant_with_immutable_caching(self):
+        css = self.hashed('css/site.css')
+        response = self.get(settings.STATIC_URL + css, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], staticfiles.IMMUTABLE)
+        with open(os.path.join(self.root, css), 'rb') as file:
+            self.assertEqual(
+                gzip.decompress(b''.join(response.streaming_content)),
+                file.read(),
+            )
+
+    @skipIf(staticfiles.brotli is None, 'пакет brotli не установлен')
+    def test_brotli_is_preferred(self):
+        url = settings.STATIC_URL + self.hashed('css/site.css')
+        response = self.get(url, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_original_name_is_not_immutable(self):
+        response = self.get(settings.STATIC_URL + 'css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(
+            response['Cache-Control'],
+            f'public, max-age={settings.STATIC_MAX_AGE}',
+        )
+
+    def test_unknown_path_goes_to_view(self):
+        response = self.get(settings.STATIC_URL + 'css/missing.css')
+        self.assertEqual(response.content, b'view')
@@ -0,0 +1,131 @@
+from io import StringIO
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Job
+
+from .. import feed_cache
+from ..models import Post
+from ..thumbnails import GEOMETRIES, QUEUE, queue_post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailQueueTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='Painter')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_create_queues_and_worker_generates(self):
+        """Пост с картинкой ставит миниатюры в очередь, воркер их делает."""
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        post = Post.objects.get()
+        self.assertEqual(
+            Job.objects.filter(queue=QUEUE).count(), len(GEOMETRIES)
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.image.url)
+
+        call_command('generate_thumbnails', processes=0, stdout=StringIO())
+        self.assertFalse(Job.objects.filter(queue=QUEUE).exists())
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertNotContains(response, post.image.url)
+        self.assertContains(response, 'cache/')
+        # Закэшированная карточка на главной тоже перерисована.
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, post.image.url)
+
+    def test_missing_thumbnail_does_not_query_kvstore_again(self):
+        """Промах KVStore запоминается, повторный рендер не ходит в базу."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост',
+            image=SimpleUploadedFile(
+                'again.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        url = reverse('posts:post_detail', args=(post.pk,))
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(
+            any('thumbnail_kvstore' in query['sql'] for query in queries)
+        )
+
+    def test_page_does_not_query_thumbnails(self):
+        """Страница решает по thumbnails_ready, без KVStore и очереди."""
+        for index in range(3):
+            Post.objects.create(
+                author=self.user,
+                text=f'Пост {index}',
+                image=SimpleUploadedFile(
+                    f'page{index}.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertFalse(any(
+            'thumbnail_kvstore' in query['sql'] or 'core_job' in query['sql']
+            for query in queries
+        ))
+        self.assertNotContains(response, 'cache/')
+
+        call_command(
+            'generate_thumbnails', processes=0, missing=True,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.filter(thumbnails_ready=True).count(), 3)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'cache/', count=3)
+
+    def test_feeds_reset_once_per_image(self):
+        """Ленты сбрасываются, когда готовы все геометрии картинки."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост',
+            image=SimpleUploadedFile(
+                'once.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        queue_post(post)
+        with mock.patch.object(feed_cache, 'bump_posts') as bump_posts:
+            call_command(
+                'generate_thumbnails', processes=0, stdout=StringIO()
+            )
+        bump_posts.assert_called_once_with()
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+import numpy as np
+
+from ..models import Comment, Group, Post, TrendingList, User
+from ..trending import GROUP_SCOPE, SITE_SCOPE, rank, scores
+
+
+class TrendingScoreTest(TestCase):
+    def test_fresh_comments_and_posts_win(self):
+        result = scores(
+            post_ages=np.array([1.0, 1.0, 48.0]),
+            comment_posts=np.array([0, 0, 1, 1, 2, 2]),
+            comment_ages=np.array([0.5, 0.5, 30.0, 30.0, 0.5, 0.5]),
+        )
+        self.assertGreater(result[0], result[1])
+        self.assertGreater(result[0], result[2])
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.group = Group.objects.create(title='Группа', slug='hot')
+        author = User.objects.create_user(username='author')
+        cls.quiet = Post.objects.create(author=author, text='Тихий пост')
+        cls.hot = Post.objects.create(
+            author=author, text='Горячий пост', group=cls.group
+        )
+        cls.old = Post.objects.create(
+            author=author, text='Старый пост', group=cls.group
+        )
+        cls.ancient = Post.objects.create(author=author, text='Архив')
+        for post, hours in (
+            (cls.quiet, 2), (cls.hot, 3), (cls.old, 60), (cls.ancient, 500),
+        ):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(hours=hours)
+            )
+        for post, count in ((cls.hot, 5), (cls.old, 5), (cls.ancient, 9)):
+            for _ in range(count):
+                Comment.objects.create(post=post, author=author, text='!')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rank(self):
+        ranked = rank()
+        self.assertEqual(
+            ranked[SITE_SCOPE], [self.hot.pk, self.quiet.pk, self.old.pk]
+        )
+        self.assertEqual(
+            ranked[GROUP_SCOPE.format(self.group.pk)],
+            [self.hot.pk, self.old.pk],
+        )
+
+    def test_pages_read_stored_ranking(self):
+        call_command('compute_trending', stdout=StringIO())
+        self.assertEqual(TrendingList.objects.count(), 2)
+        cache.clear()
+        client = Client()
+        url = reverse('posts:trending')
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertFalse(
+            any('posts_comment' in query['sql'] for query in queries)
+        )
+        content = response.content.decode()
+        self.assertLess(
+            content.index('Горячий пост'), content.index('Тихий пост')
+        )
+        self.assertNotIn('Архив', content)
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        self.assertEqual(len(queries), 0)
+
+        response = client.get(
+            reverse('posts:group_trending', args=(self.group.slug,))
+        )
+        self.assertContains(response, 'Старый пост')
+        self.assertNotContains(response, 'Тихий пост')
+
+    def test_empty_ranking(self):
+        response = Client().get(reverse('posts:trending'))
+        self.assertContains(response, 'Пока здесь пусто')
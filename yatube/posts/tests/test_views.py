@@ -68,6 +68,33 @@ class PaginatorViewsTest(TestCase):
                 response = self.guest_client.get(page, {'page': 2})
                 self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_cursor_pages(self):
+        """Курсоры after/before листают ленту без пропусков и COUNT."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url).context['page_obj']
+        with self.assertNumQueries(1):
+            second = self.guest_client.get(
+                url, {'after': first.paginator.next_cursor}
+            ).context['page_obj']
+        self.assertEqual(len(second), TEST_POST - 10)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        self.assertEqual(list(first) + list(second), expected)
+        back = self.guest_client.get(
+            url, {'before': second.paginator.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertEqual(back.number, 1)
+        self.assertTrue(back.has_next())
+
+    def test_broken_cursor(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'after': 'мусор'}
+        )
+        self.assertEqual(len(response.context['page_obj']), 10)
+
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class TaskPagesTests(TestCase):
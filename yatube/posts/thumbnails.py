@@ -0,0 +1,208 @@
+"""Генерация миниатюр вне запроса.
+
+Шаблоны по-прежнему вызывают `{% thumbnail %}`, но бэкенд только ищет
+готовую миниатюру в KVStore sorl. Если её нет, в очередь ставится задача,
+а шаблон получает оригинал изображения. Задачи идут в очередь
+`thumbnails` фоновых задач, её разбирают `run_workers --queue thumbnails`
+и `generate_thumbnails`.
+
+Когда готовы все геометрии изображения, воркер отмечает посты с ним
+флагом `thumbnails_ready`. Страницы постов рендерят шаблоны внутри
+`prefetched(...)`: по флагу из уже загруженных постов миниатюра
+подставляется по имени, а до готовности — оригинал, без запросов к
+KVStore и очереди. Миниатюры постов, загруженных до появления флага,
+ставит в очередь `generate_thumbnails --missing`.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.helpers import deserialize, serialize, tokey
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core import jobs, profiling
+
+from . import feed_cache
+from .models import Post
+
+# Все геометрии, которые используют шаблоны постов.
+GEOMETRIES = (
+    ('860x900', {'crop': 'center', 'upscale': True}),
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+QUEUE = 'thumbnails'
+DEDUP_KEY = 'thumbnail:{}'
+QUEUED_MARKER_KEY = 'thumbnail:queued:{}'
+QUEUED_MARKER_TIMEOUT = 60 * 60
+# KVStore sorl кэширует только найденные миниатюры, промах каждый раз идёт
+# в базу. Промахи помним недолго: готовая миниатюра появится с задержкой
+# не больше этого времени, зато страница не делает запрос на картинку.
+MISS_KEY = 'thumbnail:miss:{}'
+MISS_TIMEOUT = 60
+
+# Имя миниатюры → найденная миниатюра или None для страницы в рендере.
+_prefetched = ContextVar('prefetched_thumbnails', default=None)
+
+
+def thumbnail_job(source_name, geometry, serialized):
+    key = tokey(source_name, geometry, serialized)
+    return jobs.job(
+        generate, source_name, geometry, serialized,
+        queue=QUEUE, dedup_key=DEDUP_KEY.format(key),
+    )
+
+
+def enqueue_missing(items):
+    """Ставит в очередь (изображение, геометрия, опции) одним INSERT;
+    уже поставленные недавно пропускаются по маркеру в кэше.
+    """
+    queued = []
+    for source_name, geometry, options in items:
+        serialized = serialize(options)
+        marker = QUEUED_MARKER_KEY.format(
+            tokey(source_name, geometry, serialized)
+        )
+        if cache.add(marker, True, QUEUED_MARKER_TIMEOUT):
+            queued.append(thumbnail_job(source_name, geometry, serialized))
+    if queued:
+        jobs.enqueue_many(queued)
+
+
+def enqueue(source_name, geometry, options):
+    enqueue_missing([(source_name, geometry, options)])
+
+
+def queue_post(post):
+    """Ставит в очередь все миниатюры, нужные шаблонам для поста."""
+    if post.image:
+        queue_images([post.image.name])
+
+
+def queue_images(names):
+    """Ставит в очередь миниатюры пачки изображений одним INSERT."""
+    jobs.enqueue_many([
+        thumbnail_job(name, geometry, serialize(options))
+        for name in names
+        for geometry, options in GEOMETRIES
+    ])
+
+
+def _kvstore_key(name):
+    return add_prefix(ImageFile(name, default.storage).key)
+
+
+def lookup(names):
+    """Готовые миниатюры по именам: кэш sorl, затем один запрос к KVStore.
+    """
+    kv_cache = default.kvstore.cache
+    keys = {_kvstore_key(name): name for name in names}
+    # Промахи sorl кэширует как класс EMPTY_VALUE, нам нужны только строки.
+    values = {
+        key: value for key, value in kv_cache.get_many(keys).items()
+        if isinstance(value, str)
+    }
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        kv_cache.set_many(stored, settings.THUMBNAIL_CACHE_TIMEOUT)
+        values.update(stored)
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items()
+    }
+
+
+@contextmanager
+def prefetched(posts, geometry):
+    """Миниатюры geometry для постов страницы без запросов к базе."""
+    options = dict(GEOMETRIES)[geometry]
+    backend = QueuedThumbnailBackend()
+    thumbnails = {}
+    for post in posts:
+        if not post.image:
+            continue
+        name = backend.thumbnail_name(ImageFile(post.image), geometry, options)
+        thumbnails[name] = (
+            ImageFile(name, default.storage) if post.thumbnails_ready
+            else None
+        )
+    token = _prefetched.set(thumbnails)
+    try:
+        yield
+    finally:
+        _prefetched.reset(token)
+
+
+def generate(source_name, geometry, options):
+    """Генерирует одну миниатюру; вызывается в процессе воркера."""
+    backend = QueuedThumbnailBackend()
+    thumbnail = backend.generate(source_name, geometry, deserialize(options))
+    cache.delete(MISS_KEY.format(thumbnail.name))
+    # Посты отмечаются один раз, когда готовы все геометрии изображения:
+    # новый updated перерисует их карточки, сброс лент — страницы.
+    source = ImageFile(source_name)
+    names = [
+        backend.thumbnail_name(source, other, other_options)
+        for other, other_options in GEOMETRIES
+    ]
+    if len(lookup(names)) == len(names):
+        Post.objects.filter(image=source_name).update(
+            thumbnails_ready=True, updated=timezone.now()
+        )
+        feed_cache.bump_posts()
+
+
+class QueuedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не декодирует изображения в запросе."""
+
+    def _full_options(self, source, options):
+        options = dict(options)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with profiling.timer('thumbnail'):
+            return self._queued_thumbnail(file_, geometry_string, options)
+
+    def thumbnail_name(self, source, geometry_string, options):
+        return self._get_thumbnail_filename(
+            source, geometry_string, self._full_options(source, options)
+        )
+
+    def _queued_thumbnail(self, file_, geometry_string, options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        name = self.thumbnail_name(source, geometry_string, options)
+        prefetched = _prefetched.get()
+        if prefetched is not None and name in prefetched:
+            return prefetched[name] or source
+        miss = MISS_KEY.format(name)
+        if cache.get(miss):
+            return source
+        cached = default.kvstore.get(ImageFile(name, default.storage))
+        if cached:
+            return cached
+        cache.set(miss, True, MISS_TIMEOUT)
+        enqueue(source.name, geometry_string, options)
+        return source
+
+    def generate(self, file_, geometry_string, options):
+        return super().get_thumbnail(file_, geometry_string, **options)
@@ -0,0 +1,195 @@
+"""Материализованная лента подписок (fan-out on write).
+
+При публикации пост раскладывается по лентам подписчиков автора, при
+подписке лента дозаполняется старыми постами автора, при отписке —
+чистится. Авторы с огромным числом подписчиков в ленты не раскладываются:
+их посты подмешиваются при чтении (pull). Когда подписчиков у такого
+автора становится меньше порога, его посты докладываются в ленты всех
+подписчиков — иначе посты, вышедшие во время pull, из лент бы пропали.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from core.paginator import paginate
+from core.jobs import enqueue, enqueue_many, job
+
+from . import feed_cache, follow_graph
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+PULL_AUTHORS_KEY = 'timeline:pull_authors'
+PULL_AUTHORS_TIMEOUT = 300
+# Последний вычисленный набор хранится без срока: по нему видно авторов,
+# которые вернулись к раскладке в ленты.
+LAST_PULL_AUTHORS_KEY = 'timeline:pull_authors:last'
+BACKFILL_DEDUP_KEY = 'timeline:backfill:{}'
+
+
+def pull_authors():
+    """Авторы, чьи посты читаются из Post, а не из TimelineEntry."""
+    authors = cache.get(PULL_AUTHORS_KEY)
+    if authors is None:
+        authors = frozenset(
+            AuthorStats.objects.filter(
+                followers_count__gte=settings.TIMELINE_PULL_FOLLOWERS
+            ).values_list('user_id', flat=True)
+        )
+        previous = cache.get(LAST_PULL_AUTHORS_KEY, frozenset())
+        cache.set(PULL_AUTHORS_KEY, authors, PULL_AUTHORS_TIMEOUT)
+        cache.set(LAST_PULL_AUTHORS_KEY, authors, None)
+        enqueue_many([
+            job(
+                backfill_followers, author_id,
+                dedup_key=BACKFILL_DEDUP_KEY.format(author_id),
+            )
+            for author_id in sorted(previous - authors)
+        ])
+    return authors
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, settings.TIMELINE_BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out_posts([post])
+
+
+def fan_out_posts(posts):
+    """Раскладывает пачку постов по лентам подписчиков их авторов."""
+    pulled = pull_authors()
+    by_author = defaultdict(list)
+    for post in posts:
+        if post.author_id not in pulled:
+            by_author[post.author_id].append(post)
+    if not by_author:
+        return
+    # Строки подписок заблокированы до конца вставки: отписка и её prune
+    # не пройдут между чтением подписчиков и записью лент.
+    with transaction.atomic():
+        followers = Follow.objects.select_for_update().filter(
+            author_id__in=list(by_author)
+        ).values_list('author_id', 'user_id')
+        _bulk_insert(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=author_id,
+                pub_date=post.pub_date,
+            )
+            for author_id, user_id in followers.iterator()
+            for post in by_author[author_id]
+        )
+    feed_cache.bump_posts()
+
+
+def backfill_pairs(pairs):
+    """Дозаполняет ленты пачки подписок (читатель, автор) старыми постами
+    авторов: один запрос постов и одна вставка на всю пачку.
+
+    Вставляются только пары, подписка которых ещё есть, — задача могла
+    дождаться очереди уже после отписки и её prune.
+    """
+    pulled = pull_authors()
+    pairs = {(user, author) for user, author in pairs if author not in pulled}
+    if not pairs:
+        return
+    with transaction.atomic():
+        current = set(Follow.objects.select_for_update().filter(
+            user_id__in={user for user, _ in pairs},
+            author_id__in={author for _, author in pairs},
+        ).values_list('user_id', 'author_id'))
+        readers = defaultdict(list)
+        for user_id, author_id in pairs & current:
+            readers[author_id].append(user_id)
+        posts = Post.objects.filter(author_id__in=list(readers)).values_list(
+            'pk', 'author_id', 'pub_date'
+        )
+        _bulk_insert(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for post_id, author_id, pub_date in posts.iterator()
+            for user_id in readers[author_id]
+        )
+    for user_id in {user for users in readers.values() for user in users}:
+        feed_cache.bump_user(user_id)
+
+
+def backfill(user_id, author_id):
+    backfill_pairs([(user_id, author_id)])
+
+
+def backfill_followers(author_id):
+    """Докладывает посты автора, вышедшего из pull, в ленты подписчиков."""
+    if author_id in pull_authors():
+        return
+    posts = list(Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    ))
+    with transaction.atomic():
+        followers = Follow.objects.select_for_update().filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        _bulk_insert(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id in followers.iterator()
+            for post_id, pub_date in posts
+        )
+    feed_cache.bump_posts()
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    feed_cache.bump_user(user_id)
+
+
+def on_post_created(post):
+    enqueue(fan_out_post, post.pk)
+
+
+def on_follow(follow):
+    enqueue(backfill, follow.user_id, follow.author_id)
+
+
+def on_unfollow(follow):
+    enqueue(prune, follow.user_id, follow.author_id)
+
+
+def timeline_page(request, per_page):
+    """Страница ленты подписок текущего пользователя."""
+    user = request.user
+    pulled = pull_authors()
+    if pulled:
+        pulled = follow_graph.followed_among(user.pk, pulled)
+    if pulled:
+        posts = Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+            | Q(author_id__in=pulled)
+        ).select_related('author', 'group')
+        return paginate(request, posts, per_page)
+    entries = TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    )
+    page = paginate(request, entries, per_page)
+    page.object_list = [entry.post for entry in page.object_list]
+    return page
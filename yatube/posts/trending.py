@@ -0,0 +1,155 @@
+"""Популярные посты: скорость комментариев с затуханием по времени.
+
+Периодическая команда `compute_trending` берёт посты за последние
+WINDOW часов и их комментарии за то же время и считает на массивах NumPy
+
+    оценка = (1 + Σ 2^(-возраст комментария / HALF_LIFE)) /
+             (возраст поста + 2) ^ GRAVITY,
+
+то есть свежие комментарии весят больше старых, а старые посты
+опускаются независимо от числа комментариев. Лучшие SIZE постов сайта и
+каждой группы сохраняются в TrendingList. Страница «Популярное» читает
+готовый список одной записью кэша, живой агрегации по комментариям в
+запросе нет.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, IntegerField, When
+from django.utils import timezone
+import numpy as np
+
+from .models import Comment, Post, TrendingList
+from .recommendations import top_per_row
+
+WINDOW = 72
+HALF_LIFE = 6
+GRAVITY = 1.5
+SIZE = 30
+COMMENTS_BATCH = 500
+
+SITE_SCOPE = 'site'
+GROUP_SCOPE = 'group:{}'
+TRENDING_KEY = 'trending:{}'
+
+
+def _hours(moments, now):
+    return (now.timestamp() - np.asarray(moments, dtype=float)) / 3600
+
+
+def scores(post_ages, comment_posts, comment_ages, half_life=HALF_LIFE,
+           gravity=GRAVITY):
+    """Оценки постов; comment_posts — индексы постов в post_ages."""
+    velocity = np.bincount(
+        comment_posts,
+        weights=np.exp2(-comment_ages / half_life),
+        minlength=len(post_ages),
+    )
+    return (1 + velocity) / (post_ages + 2) ** gravity
+
+
+def load_recent(now, window=WINDOW):
+    since = now - timedelta(hours=window)
+    posts = list(
+        Post.objects.filter(pub_date__gte=since).order_by()
+        .values_list('pk', 'group_id', 'pub_date')
+    )
+    post_ids = np.array([row[0] for row in posts], dtype=np.int64)
+    groups = np.array(
+        [-1 if row[1] is None else row[1] for row in posts], dtype=np.int64
+    )
+    ages = _hours([row[2].timestamp() for row in posts], now)
+    comment_posts, comment_moments = [], []
+    # Комментарии выбираются по индексу (post, created) пачками постов.
+    for start in range(0, len(posts), COMMENTS_BATCH):
+        rows = Comment.objects.filter(
+            post_id__in=post_ids[start:start + COMMENTS_BATCH].tolist(),
+            created__gte=since,
+        ).order_by().values_list('post_id', 'created')
+        for post_id, created in rows:
+            comment_posts.append(post_id)
+            comment_moments.append(created.timestamp())
+    order = np.argsort(post_ids)
+    post_ids, groups, ages = post_ids[order], groups[order], ages[order]
+    return (
+        post_ids, groups, ages,
+        np.searchsorted(post_ids, np.array(comment_posts, dtype=np.int64)),
+        _hours(comment_moments, now),
+    )
+
+
+def rank(now=None, window=WINDOW, size=SIZE):
+    """Словарь scope → id постов по убыванию оценки."""
+    now = now or timezone.now()
+    post_ids, groups, ages, comment_posts, comment_ages = load_recent(
+        now, window
+    )
+    score = scores(ages, comment_posts, comment_ages)
+    _, columns, _ = top_per_row(
+        np.zeros(len(post_ids), dtype=np.int64), post_ids, score, size
+    )
+    ranked = {SITE_SCOPE: columns.tolist()}
+    grouped = groups >= 0
+    rows, columns, _ = top_per_row(
+        groups[grouped], post_ids[grouped], score[grouped], size
+    )
+    for group_id in np.unique(rows).tolist():
+        ranked[GROUP_SCOPE.format(group_id)] = (
+            columns[rows == group_id].tolist()
+        )
+    return ranked
+
+
+def compute(now=None, window=WINDOW, size=SIZE):
+    """Пересчитывает и сохраняет все рейтинги, возвращает их число."""
+    now = now or timezone.now()
+    ranked = rank(now, window, size)
+    lists = [
+        TrendingList(
+            scope=scope,
+            post_ids=','.join(map(str, ids)),
+            computed=now,
+        )
+        for scope, ids in ranked.items()
+    ]
+    with transaction.atomic():
+        TrendingList.objects.all().delete()
+        TrendingList.objects.bulk_create(lists)
+    # С общим кэшем (Redis, Memcached) страницы увидят новый рейтинг
+    # сразу, иначе — по истечении TRENDING_CACHE_TIMEOUT.
+    cache.set_many(
+        {TRENDING_KEY.format(item.scope): _entry(item) for item in lists},
+        settings.TRENDING_CACHE_TIMEOUT,
+    )
+    return len(lists)
+
+
+def _entry(trending):
+    ids = [int(pk) for pk in trending.post_ids.split(',') if pk]
+    return trending.computed.timestamp(), ids
+
+
+def trending_ids(scope):
+    """(момент расчёта, id постов) рейтинга: кэш, затем одна строка БД."""
+    key = TRENDING_KEY.format(scope)
+    entry = cache.get(key)
+    if entry is None:
+        trending = TrendingList.objects.filter(scope=scope).first()
+        entry = (0.0, []) if trending is None else _entry(trending)
+        cache.set(key, entry, settings.TRENDING_CACHE_TIMEOUT)
+    return entry
+
+
+def ranked_posts(ids):
+    """Ленивый queryset постов в порядке рейтинга."""
+    if not ids:
+        return Post.objects.none()
+    order = Case(
+        *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+        output_field=IntegerField(),
+    )
+    return Post.objects.filter(pk__in=ids).select_related(
+        'author', 'group'
+    ).order_by(order)
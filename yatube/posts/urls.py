@@ -8,12 +8,24 @@ urlpatterns = [
     # Главная страница
     path('', views.index, name='index'),
     path('group/<slug>/', views.group_posts, name='group_lists'),
+    # Популярное: готовые рейтинги сайта и группы
+    path('trending/', views.trending, name='trending'),
+    path(
+        'group/<slug>/trending/',
+        views.group_trending,
+        name='group_trending'
+    ),
     # Профайл пользователя
     path('profile/<username>/', views.profile, name='profile'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('create/', views.post_create, name='post_create'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -25,6 +37,11 @@ urlpatterns = [
         views.profile_follow,
         name='profile_follow'
     ),
+    path(
+        'profile/<str:username>/export/',
+        views.profile_export,
+        name='profile_export'
+    ),
     path(
         'profile/<str:username>/unfollow/',
         views.profile_unfollow,
@@ -1,75 +1,187 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_http_methods
 
+from core.paginator import paginate
+from core.db_router import read_from_replica
+from core.query_budget import query_budget
+
+from . import conditional, follow_graph, trending as trending_lists
+from .counters import stats_for
+from .export import FORMATS, export_lines
+from .feed_cache import feed_cache_context
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Comment, Follow, Group, Post, User
+from .recommendations import suggestions_for
+from .thumbnails import prefetched, queue_post
+from .timeline import timeline_page
 
 NUMBER_POSTS = 10
+# Геометрия картинки в posts/post_detail.html.
+DETAIL_GEOMETRY = '960x339'
+NUMBER_COMMENTS = 20
+
+
+def comments_context(request, post_id):
+    """Одна страница комментариев поста, ?order=old — сначала старые."""
+    order = 'old' if request.GET.get('order') == 'old' else 'new'
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    return {
+        'post_id': post_id,
+        'comments_order': order,
+        'comments': paginate(
+            request, comments, NUMBER_COMMENTS, 'created', order == 'new'
+        ),
+    }
 
 
+@query_budget(5)
+@read_from_replica
+@conditional.conditional_page(conditional.feed_page)
 def index(request):
-    post_list = Post.objects.all().order_by('-pub_date')
-    paginator = Paginator(post_list, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = paginate(request, post_list, NUMBER_POSTS)
     context = {
         'page_obj': page_obj,
+        **feed_cache_context(request, 'index'),
     }
     return render(request, 'posts/index.html', context)
 
 
-def group_posts(request, slug):
+@query_budget(5)
+@read_from_replica
+@require_http_methods(['GET'])
+def trending(request):
+    """Популярные посты сайта из готового рейтинга."""
+    computed, ids = trending_lists.trending_ids(trending_lists.SITE_SCOPE)
+    context = {
+        'page_obj': trending_lists.ranked_posts(ids),
+        'trending_computed': computed,
+        **feed_cache_context(request, 'trending', trending_lists.SITE_SCOPE),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@query_budget(6)
+@read_from_replica
+@require_http_methods(['GET'])
+def group_trending(request, slug):
     group = get_object_or_404(Group, slug=slug)
+    scope = trending_lists.GROUP_SCOPE.format(group.pk)
+    computed, ids = trending_lists.trending_ids(scope)
+    context = {
+        'group': group,
+        'page_obj': trending_lists.ranked_posts(ids),
+        'trending_computed': computed,
+        **feed_cache_context(request, 'trending', scope),
+    }
+    return render(request, 'posts/trending.html', context)
 
-    posts_list = Post.objects.all().filter(group=group).order_by(
-        '-pub_date'
-    )
 
-    paginator = Paginator(posts_list, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+@query_budget(6)
+@read_from_replica
+@conditional.conditional_page(conditional.feed_page)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+
+    posts_list = group.posts.select_related('author')
+    page_obj = paginate(request, posts_list, NUMBER_POSTS)
     context = {
         'group': group,
         'page_obj': page_obj,
+        **feed_cache_context(request, 'group', group.pk),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(8)
+@read_from_replica
+@conditional.conditional_page(conditional.author_page)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all().order_by('-pub_date')
-    paginator = Paginator(posts, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = author.posts.select_related('group')
+    page_obj = paginate(request, posts, NUMBER_POSTS)
     following = False
+    suggestions = []
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author
-        ).exists()
+        following = follow_graph.is_following(request.user.pk, author.pk)
+        suggestions = suggestions_for(request.user.pk)
     context = {
         'author': author,
+        'author_stats': stats_for(author),
         'page_obj': page_obj,
         'following': following,
+        'suggestions': suggestions,
+        **feed_cache_context(request, 'profile', author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(4)
+@require_http_methods(['GET'])
+@login_required
+def profile_export(request, username):
+    """Выгрузка постов: ?format=csv|jsonl, &comments=1, &images=1."""
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        return redirect('posts:profile', username)
+    file_format = request.GET.get('format')
+    if file_format not in FORMATS:
+        file_format = 'csv'
+    response = StreamingHttpResponse(
+        export_lines(
+            author,
+            file_format,
+            comments=bool(request.GET.get('comments')),
+            images=bool(request.GET.get('images')),
+            image_url=request.build_absolute_uri,
+        ),
+        content_type=FORMATS[file_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}-posts.{file_format}"'
+    )
+    return response
+
+
+@query_budget(7)
+@read_from_replica
 @require_http_methods(['GET'])
+@conditional.conditional_page(conditional.post_page)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
     user = post.author
     form = CommentForm(request.POST or None)
     context = {
         'post': post,
         'user': user,
+        'author_stats': stats_for(user),
         'form': form,
-        'comments': post.comments,
+        **comments_context(request, post_id),
     }
-    return render(request, 'posts/post_detail.html', context)
+    with prefetched([post], DETAIL_GEOMETRY):
+        return render(request, 'posts/post_detail.html', context)
+
+
+@query_budget(5)
+@read_from_replica
+@require_http_methods(['GET'])
+@conditional.conditional_page(conditional.post_page)
+def post_comments(request, post_id):
+    """HTML-фрагмент со следующей порцией комментариев."""
+    return render(
+        request,
+        'includes/comment_list.html',
+        comments_context(request, post_id),
+    )
 
 
+@query_budget(12)
 @login_required
 def post_create(request):
     form = PostForm(request.POST, files=request.FILES or None,)
@@ -77,11 +189,13 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        queue_post(post)
         return redirect('posts:profile', request.user)
     context = {'form': form}
     return render(request, 'posts/post_create.html', context)
 
 
+@query_budget(9)
 @require_http_methods(['GET', 'POST'])
 @login_required
 def post_edit(request, post_id):
@@ -94,7 +208,12 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            post.thumbnails_ready = False
         form.save()
+        if image_changed:
+            queue_post(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'post': post,
@@ -104,6 +223,7 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
+@query_budget(6)
 @require_http_methods(['GET', 'POST'])
 @login_required
 def add_comment(request, post_id):
@@ -117,19 +237,21 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(6)
+@read_from_replica
 @login_required
 def follow_index(request):
-    posts_author = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts_author, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = timeline_page(request, NUMBER_POSTS)
     context = {
         'page_obj': page_obj,
+        'suggestions': suggestions_for(request.user.pk),
+        **feed_cache_context(request, 'follow'),
     }
 
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(12)
 @login_required
 def profile_follow(request, username):
     if request.user.username != username:
@@ -138,6 +260,7 @@ def profile_follow(request, username):
     return redirect('posts:follow_index')
 
 
+@query_budget(9)
 @login_required
 def profile_unfollow(request, username):
     if request.user.username != username:
@@ -0,0 +1,74 @@
+"""Инвертированный индекс постов на обычной таблице.
+
+Поиск идёт по индексу (term, post), поэтому его стоимость зависит от
+числа совпадений, а не от размера таблицы постов.
+"""
+from collections import Counter
+import re
+
+from django.db.models import Count, ExpressionWrapper, IntegerField, Sum
+
+from core.jobs import enqueue
+from posts.models import Post
+
+from .models import SearchToken
+
+WORD_RE = re.compile(r'\w{2,}')
+MAX_TERM_LENGTH = 32
+MAX_QUERY_TERMS = 8
+# Каждое совпавшее слово запроса весит больше любого числа повторов:
+# повторы одного слова считаются не дальше MAX_TERM_COUNT, и их сумма по
+# всем словам запроса меньше TERM_WEIGHT.
+TERM_WEIGHT = 1000
+MAX_TERM_COUNT = (TERM_WEIGHT - 1) // MAX_QUERY_TERMS
+
+
+def tokenize(text):
+    text = text.lower().replace('ё', 'е')
+    return [word[:MAX_TERM_LENGTH] for word in WORD_RE.findall(text)]
+
+
+def _tokens(post_id, text):
+    return [
+        SearchToken(
+            term=term, post_id=post_id, count=min(count, MAX_TERM_COUNT)
+        )
+        for term, count in Counter(tokenize(text)).items()
+    ]
+
+
+def index_post(post_id):
+    SearchToken.objects.filter(post_id=post_id).delete()
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True
+    ).first()
+    if text is not None:
+        SearchToken.objects.bulk_create(_tokens(post_id, text))
+
+
+def schedule_index(post):
+    enqueue(index_post, post.pk)
+
+
+def index_posts(posts):
+    """Переиндексирует пачку постов, переданных парами (pk, text)."""
+    posts = list(posts)
+    SearchToken.objects.filter(post_id__in=[pk for pk, _ in posts]).delete()
+    SearchToken.objects.bulk_create(
+        [token for pk, text in posts for token in _tokens(pk, text)],
+        batch_size=500,
+    )
+
+
+def search(query):
+    """Посты, содержащие слова запроса, с рейтингом в поле `score`."""
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return Post.objects.none()
+    score = ExpressionWrapper(
+        Count('search_tokens') * TERM_WEIGHT + Sum('search_tokens__count'),
+        output_field=IntegerField(),
+    )
+    return Post.objects.filter(search_tokens__term__in=terms).annotate(
+        score=score
+    )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from search.index import index_posts
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        last_pk, total = 0, 0
+        while True:
+            posts = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'text')[:batch_size]
+            )
+            if not posts:
+                break
+            with transaction.atomic():
+                index_posts(posts)
+            last_pk = posts[-1][0]
+            total += len(posts)
+        self.stdout.write(f'Проиндексировано постов: {total}')
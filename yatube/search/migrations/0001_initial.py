@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def index_existing_posts(apps, schema_editor):
+    from collections import Counter
+
+    from search.index import tokenize
+
+    Post = apps.get_model('posts', 'Post')
+    SearchToken = apps.get_model('search', 'SearchToken')
+    for pk, text in Post.objects.values_list('pk', 'text').iterator():
+        SearchToken.objects.bulk_create([
+            SearchToken(term=term, post_id=pk, count=min(count, 2 ** 15))
+            for term, count in Counter(tokenize(text)).items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0010_thumbnailjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32, verbose_name='Слово')),
+                ('count', models.PositiveSmallIntegerField(default=1, verbose_name='Вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Слово индекса',
+                'verbose_name_plural': 'Слова индекса',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchtoken',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_token'),
+        ),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
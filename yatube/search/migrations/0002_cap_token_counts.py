@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 00:20
+
+from django.db import migrations
+
+# search.index.MAX_TERM_COUNT на момент миграции.
+MAX_TERM_COUNT = 124
+
+
+def cap_counts(apps, schema_editor):
+    SearchToken = apps.get_model('search', 'SearchToken')
+    SearchToken.objects.filter(count__gt=MAX_TERM_COUNT).update(
+        count=MAX_TERM_COUNT
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(cap_counts, migrations.RunPython.noop),
+    ]
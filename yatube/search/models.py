@@ -0,0 +1,27 @@
+from django.db import models
+
+from posts.models import Post
+
+
+class SearchToken(models.Model):
+    """Запись инвертированного индекса: слово -> пост."""
+    term = models.CharField('Слово', max_length=32)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name='Пост',
+    )
+    count = models.PositiveSmallIntegerField('Вхождений', default=1)
+
+    class Meta:
+        verbose_name = 'Слово индекса'
+        verbose_name_plural = 'Слова индекса'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('term', 'post'), name='unique_search_token'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.term} -> {self.post_id}'
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import Post
+
+from .index import schedule_index
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    schedule_index(instance)
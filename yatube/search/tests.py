@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+from .index import search, tokenize
+from .models import SearchToken
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Searcher')
+        cls.both = Post.objects.create(
+            author=cls.user, text='Ёжик и туман, снова ёжик'
+        )
+        cls.one = Post.objects.create(author=cls.user, text='Туман над рекой')
+        cls.none = Post.objects.create(author=cls.user, text='Солнце')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_tokenize(self):
+        """Слова приводятся к нижнему регистру, ё заменяется на е."""
+        self.assertEqual(tokenize('Ёжик, в ТУМАНЕ!'), ['ежик', 'тумане'])
+
+    def test_ranked_results(self):
+        """Пост, где совпало больше слов, идёт первым."""
+        results = list(search('ежик туман').order_by('-score', '-pk'))
+        self.assertEqual(results, [self.both, self.one])
+
+    def test_repeats_do_not_outweigh_terms(self):
+        """Повторы одного слова не перевешивают ещё одно совпавшее слово."""
+        spam = Post.objects.create(author=self.user, text='ёжик ' * 2000)
+        results = list(search('ежик туман').order_by('-score', '-pk'))
+        self.assertEqual(results[0], self.both)
+        self.assertIn(spam, results)
+
+    def test_index_follows_edits(self):
+        """Индекс обновляется при сохранении поста."""
+        self.none.text = 'Туман рассеялся'
+        self.none.save()
+        self.assertIn(self.none, search('туман'))
+        self.assertFalse(SearchToken.objects.filter(term='солнце').exists())
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты."""
+        response = self.guest_client.get(
+            reverse('search:search'), {'q': 'туман'}
+        )
+        self.assertTemplateUsed(response, 'search/search.html')
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertNotContains(response, 'Солнце')
+
+    def test_search_cursor_pages(self):
+        """Результаты листаются курсором по рейтингу."""
+        for number in range(12):
+            Post.objects.create(author=self.user, text=f'Туман {number}')
+        url = reverse('search:search')
+        first = self.guest_client.get(url, {'q': 'туман'}).context['page_obj']
+        second = self.guest_client.get(url, {
+            'q': 'туман', 'after': first.paginator.next_cursor
+        }).context['page_obj']
+        self.assertEqual(len(first) + len(second), 14)
+        self.assertFalse(set(first) & set(second))
+
+    def test_rebuild_index(self):
+        """Команда перестраивает индекс с нуля."""
+        SearchToken.objects.all().delete()
+        call_command('rebuild_search_index', batch_size=2, stdout=StringIO())
+        self.assertIn(self.one, search('река рекой'))
@@ -0,0 +1,25 @@
+from urllib.parse import urlencode
+
+from django.shortcuts import render
+
+from core.db_router import read_from_replica
+from core.paginator import ScoreCursorPaginator
+from posts.views import NUMBER_POSTS
+
+from .index import search as search_posts
+
+
+@read_from_replica
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = ScoreCursorPaginator(
+        search_posts(query).select_related('author', 'group'),
+        NUMBER_POSTS,
+        'score',
+    )
+    context = {
+        'query': query,
+        'query_string': urlencode({'q': query}),
+        'page_obj': paginator.page_for_request(request),
+    }
+    return render(request, 'search/search.html', context)
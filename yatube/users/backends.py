@@ -0,0 +1,41 @@
+"""Пользователь запроса из кэша.
+
+С сессиями cached_db и этим бэкендом авторизованный запрос узнаёт
+пользователя без обращений к базе: сессия и объект User лежат в кэше.
+Запись пользователя в кэше удаляется при каждом его сохранении (смена
+пароля, last_login при входе, правка профиля) и удалении; массовые
+`update()` сигналов не шлют, после них нужен `forget`. Удаление видно
+всем воркерам, только если кэш общий, — это проверяет core.checks.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+USER_KEY = 'auth:user:{}'
+
+
+def _key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def forget(user_ids):
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = _key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Основная база: с отставшей реплики в кэш попал бы старый
+            # хэш пароля, и сброшенные сессии продолжали бы работать.
+            User = get_user_model()
+            user = User._default_manager.db_manager(
+                DEFAULT_DB_ALIAS
+            ).filter(pk=user_id).first()
+            if user is None:
+                return None
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
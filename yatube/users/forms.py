@@ -1,5 +1,9 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.contrib.sites.shortcuts import get_current_site
+
+from core.jobs import enqueue
+from .emails import send_password_reset
 
 User = get_user_model()
 
@@ -8,3 +12,34 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо со ссылкой сброса собирает и отправляет воркер очереди.
+
+    В задачу попадает только id пользователя: токен сброса создаётся в
+    воркере и не хранится в аргументах задачи. Поэтому генератор токенов
+    всегда стандартный, а extra_email_context должен сериализоваться в
+    JSON.
+    """
+
+    def save(self, domain_override=None,
+             subject_template_name='registration/password_reset_subject.txt',
+             email_template_name='registration/password_reset_email.html',
+             use_https=False, token_generator=None, from_email=None,
+             request=None, html_email_template_name=None,
+             extra_email_context=None):
+        if domain_override:
+            site_name = domain = domain_override
+        else:
+            current_site = get_current_site(request)
+            site_name, domain = current_site.name, current_site.domain
+        for user in self.get_users(self.cleaned_data['email']):
+            enqueue(
+                send_password_reset, user.pk, domain, site_name, use_https,
+                subject_template_name, email_template_name,
+                from_email=from_email,
+                html_email_template_name=html_email_template_name,
+                extra_email_context=extra_email_context,
+                priority=10,
+            )
@@ -1,8 +1,17 @@
-
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core import checks, jobs
+from core.models import Job
+
+from . import backends
+
 
 User = get_user_model()
 
@@ -29,3 +38,95 @@ class TaskURLTests(TestCase):
             with self.subTest(reverse_name=reverse_name):
                 response = self.guest_client.get(reverse_name)
                 self.assertTemplateUsed(response, template)
+
+
+class CachedAuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='Sazan', password='old-password-1'
+        )
+        self.client = Client()
+        self.client.login(username='Sazan', password='old-password-1')
+        # Первый запрос кладёт в кэш пользователя.
+        self.client.get(reverse('about:author'))
+
+    def test_authenticated_request_does_not_query_session_or_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('"django_session"', tables)
+        self.assertNotIn('"auth_user"', tables)
+
+    def test_saved_user_is_reloaded(self):
+        self.user.first_name = 'Новое'
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.wsgi_request.user.first_name, 'Новое')
+
+    def test_password_change_ends_other_sessions(self):
+        self.user.set_password('new-password-2')
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    def test_inactive_user_is_logged_out(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+
+class SharedCacheTests(TestCase):
+    def test_password_change_drops_cached_user(self):
+        """После смены пароля get_user отдаёт пользователя с новым хэшем."""
+        cache.clear()
+        user = User.objects.create_user(username='Sazan', password='old-1')
+        backend = backends.CachedModelBackend()
+        old_hash = backend.get_user(user.pk).get_session_auth_hash()
+        user.set_password('new-2')
+        user.save()
+        fresh = backend.get_user(user.pk)
+        self.assertTrue(fresh.check_password('new-2'))
+        self.assertNotEqual(fresh.get_session_auth_hash(), old_hash)
+
+    @override_settings(SHARED_CACHE_REQUIRED=True)
+    def test_check_rejects_process_local_cache(self):
+        errors = checks.check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+        shared = {
+            'default': {
+                'BACKEND': 'core.profiling.ProfiledCache',
+                'LOCATION': '127.0.0.1:11211',
+                'OPTIONS': {
+                    'BACKEND': 'django.core.cache.backends.memcached.'
+                               'MemcachedCache',
+                },
+            },
+        }
+        with override_settings(CACHES=shared):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class PasswordResetTests(TestCase):
+    def test_token_is_made_by_worker(self):
+        """В задаче нет токена сброса, письмо с ним собирает воркер."""
+        user = User.objects.create_user(
+            username='Forgetful', email='forgetful@example.com',
+            password='old-password',
+        )
+        Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'forgetful@example.com'},
+        )
+        job = Job.objects.get()
+        token = default_token_generator.make_token(user)
+        self.assertNotIn(token, job.arguments)
+        self.assertEqual(mail.outbox, [])
+
+        jobs.Worker().work(burst=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['forgetful@example.com'])
+        self.assertIn(token, mail.outbox[0].body)
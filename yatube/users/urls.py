@@ -2,6 +2,7 @@ from django.contrib.auth.views import LogoutView, LoginView, PasswordResetView
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -19,8 +20,10 @@ urlpatterns = [
     path('signup/', views.SignUp.as_view(), name='signup'),
     path(
         'password_reset/',
-        PasswordResetView.as_view
-        (template_name='users/password_reset_form.html'),
+        PasswordResetView.as_view(
+            template_name='users/password_reset_form.html',
+            form_class=QueuedPasswordResetForm,
+        ),
         name='password_reset_form',
     ),
 ]
@@ -34,25 +34,33 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'search.apps.SearchConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.metrics.MetricsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.profiling.ProfiledDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,6 +88,28 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения лент, профилей и постов: пути к файлам SQLite через
+# os.pathsep в YATUBE_REPLICAS. В тестах реплики смотрят в тестовую базу.
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(os.pathsep)),
+    start=1,
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Сколько секунд после своей записи пользователь читает с основной базы;
+# должно перекрывать обычное отставание реплик.
+REPLICA_STICKY_SECONDS = 5
+# Необязательная проба отставания (dotted path к функции alias → секунды);
+# реплики с отставанием больше REPLICA_MAX_LAG не используются.
+REPLICA_LAG_PROBE = None
+REPLICA_MAX_LAG = 10
+REPLICA_LAG_CHECK_INTERVAL = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -121,6 +151,25 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# collectstatic пишет в STATIC_ROOT файлы с хэшем в имени, манифест
+# staticfiles.json и сжатые копии .gz/.br (core.staticfiles). Без DEBUG их
+# отдаёт StaticFilesMiddleware: хэшированные — с immutable на год,
+# прочие — на STATIC_MAX_AGE секунд.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 60
+
+# Сессия и пользователь запроса читаются из кэша (users.backends), база —
+# только при промахе. Кэш общий (см. CACHES), так что выход и смена пароля
+# в одном воркере сразу действуют во всех. ModelBackend оставлен для
+# сессий, открытых до его замены, чтобы никого не разлогинить.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'default'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -136,8 +185,110 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Бэкенд кэша оборачивается ProfiledCache (замеры для профиля запроса и
+# метрик), настоящий задаётся в OPTIONS['BACKEND']. Через кэш
+# инвалидируются сессии, пользователь запроса, подписки, ленты и лимиты,
+# поэтому без DEBUG он должен быть общим для всех воркеров (memcached,
+# redis): `manage.py check` не пропустит кэш в памяти процесса.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.profiling.ProfiledCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'BACKEND': os.environ.get(
+                'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+            ),
+        },
     }
 }
+SHARED_CACHE_REQUIRED = not DEBUG
+
+# Фоновые задачи (core.jobs): очередь на таблице Job, которую разбирает
+# `manage.py run_workers`. В DEBUG задачи очереди default выполняются
+# сразу при постановке. Упавшая задача повторяется через JOBS_RETRY_BASE,
+# 2 × JOBS_RETRY_BASE, ... секунд (не больше JOBS_RETRY_MAX), всего до
+# JOBS_MAX_ATTEMPTS попыток. Воркер держит задачу JOBS_LEASE секунд.
+TASKS_ALWAYS_EAGER = DEBUG
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BASE = 10
+JOBS_RETRY_MAX = 60 * 60
+JOBS_LEASE = 60 * 5
+
+# Лента подписок: авторы с таким числом подписчиков не раскладываются
+# по лентам, их посты подмешиваются при чтении.
+TIMELINE_PULL_FOLLOWERS = 1000
+TIMELINE_BATCH_SIZE = 500
+
+# Фрагменты лент инвалидируются счётчиками поколений в общем кэше, TTL —
+# страховка.
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+# Ключ карточки поста включает его updated, устаревшие карточки просто
+# перестают запрашиваться.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Пользователь запроса удаляется из кэша при сохранении, TTL — страховка.
+AUTH_USER_CACHE_TIMEOUT = 60 * 60
+# Подписки читателя сбрасываются при каждом изменении, TTL — страховка.
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+# Рекомендации подписок пересчитывает `recommend_follows`, страницы
+# читают их из кэша.
+FOLLOW_SUGGESTIONS_TIMEOUT = 60 * 60
+# Рейтинги «Популярного» пересчитывает `compute_trending` (по cron).
+TRENDING_CACHE_TIMEOUT = 60 * 5
+
+# Миниатюры генерируют воркеры очереди thumbnails (`run_workers` или
+# `generate_thumbnails`), в запросе отдаётся готовая миниатюра или оригинал.
+THUMBNAIL_BACKEND = 'posts.thumbnails.QueuedThumbnailBackend'
+
+# В разработке каждый запрос сверяется с бюджетом SQL-запросов своего
+# представления (`@query_budget`); превышение пишется в лог или, если
+# QUERY_BUDGET_RAISE, приводит к ошибке.
+QUERY_BUDGET_RAISE = False
+if DEBUG:
+    MIDDLEWARE.append('core.query_budget.QueryBudgetMiddleware')
+
+# Профиль запроса (SQL, шаблоны, кэш, миниатюры): заголовок Server-Timing
+# и JSON-строка в лог для доли запросов. При выключенных обоих профиль
+# не собирается.
+PROFILING_SERVER_TIMING = DEBUG
+PROFILING_LOG_SAMPLE_RATE = 0.0
+
+# Метрики Prometheus: каждый процесс пишет свой mmap-файл в METRICS_DIR,
+# /metrics/ суммирует их. Каталог свой у каждой выкладки, его очищает
+# `manage.py clear_metrics` перед запуском воркеров; без METRICS_DIR
+# метрики выключены (тесты пишут их во временный каталог). SQL-запросы и
+# обращения к кэшу считаются по профилю доли запросов.
+METRICS_DIR = os.environ.get('METRICS_DIR')
+METRICS_PROFILE_SAMPLE_RATE = 0.05
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Ограничение частоты записей (счётчик окна в общем кэше): для имени URL —
+# ограничиваемые методы и лимиты вошедшего пользователя и анонимного IP в
+# виде (запросов, окно в секундах). За обратным прокси адрес клиента
+# берётся из CLIENT_IP_HEADER (например, HTTP_X_FORWARDED_FOR), иначе все
+# клиенты делили бы один счётчик с адресом прокси.
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER')
+RATE_LIMITS = {
+    'posts:post_create': {
+        'methods': ('POST',), 'user': (10, 60), 'ip': (30, 60),
+    },
+    'posts:add_comment': {
+        'methods': ('POST',), 'user': (20, 60), 'ip': (60, 60),
+    },
+    'posts:profile_follow': {
+        'methods': ('GET', 'POST'), 'user': (30, 60), 'ip': (90, 60),
+    },
+    'posts:profile_unfollow': {
+        'methods': ('GET', 'POST'), 'user': (30, 60), 'ip': (90, 60),
+    },
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.profiling': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}